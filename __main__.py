@@ -1,298 +1,282 @@
 from __future__ import annotations
 import py_hot_reload
+import hashlib
 import os
 import json
+import select
 import sys
+import time
 from typing import Dict, Any
-from src.types.ConfigTypes import GameConfig, ConfigTransitionRequirement
-from src.classes.Areas import Area, Exit
-from src.classes.Characters import Enemy, NPC, Player
-from src.classes.Items import Item
-from src.classes.Areas import Group, Area, TransitionRequirement, Exit
+from src.types.ConfigTypes import GameConfig
+from src.classes.Characters import Player
 from src.classes.World import World
-from src.classes.Events import Event, ThrowEvent, EnterEvent, TakeEvent, ExamineEvent, UseEvent, Affect, Condition
+from src.classes.Loaders import LinkError, WorldLinker
+from src.classes.Caches import WorldCache
+from src.classes.Journals import Journal, JournalError
 from src.singletons.Locale import locale as loc
 from src.singletons.GamePrint import gamePrint
 
 class Game:
+    config_path = './game.config.json'
+    cache_directory = './.cache'
+    save_directory = './saves'
     player: Player
     world: World
 
-    def load_data(self):
-        game_config: GameConfig | None = None
-        with open('./game.config.json', 'r') as f:
-            game_config = json.load(f)
-
-        if game_config is None:
-            gamePrint.abs_print("Could not load game configuration.")
-            sys.exit(1)
-            return None
-
-        self.world = World()
-        
-        # Load items
-        for item in game_config['items']:
-            item_obj = Item(
-                id=item['id'],
-                name=loc.t(item['t_name']), 
-                description=loc.t(item['t_description']),
-                isInventoryItem=item['isInventoryItem'],
-                is_light_item=item['isLightItem'],
-            )
-            if 'lightCount' in item:
-                item_obj.light_count = item['lightCount']
-            if 'isHidden' in item:
-                item_obj.is_hidden = item['isHidden']
-            self.world.data_items.add(item['id'], item_obj)
-
-        # Load Groups
-        for group in game_config['groups']:
-            self.world.data_groups.add(group['id'], Group(
-                id=group['id'],
-                name=loc.t(group['t_name']),
-                enter_description=loc.t(group['t_enterDescription']),
-                exit_description=loc.t(group['t_exitDescription']),
-            ))
+    def __init__(self, world_directory: str | None = None):
+        # python . --world=<dir> plays a world written by the generate mode instead of the bundled one
+        if world_directory is not None:
+            from src.tools.WorldGenerator import world_paths
+            self.config_path, locale_files = world_paths(world_directory)
+            self.cache_directory = os.path.join(world_directory, '.cache')
+            loc.use_files(locale_files)
 
-        # Load areas
-        for area in game_config['areas']:
-            self.world.data_areas.add(area['id'], Area(
-                id=area['id'],
-                name=loc.t(area['t_name']),
-                enter_description=loc.t(area['t_enterDescription']),
-                config=area,
-                require_light=area['requireLight'],
-                is_hidable=area['isHidable']
-            ))
-            for group_id in area['r_groups']:
-                self.world.data_groups.has_get(group_id, lambda group: group.areas.add(area['id'], self.world.data_areas.get(area['id'])))
-                self.world.data_areas.get(area['id']).groups.append(self.world.data_groups.get(group_id))
-
-        # Load exits and items for areas
-        exit_registration_tracker: Dict[str, Exit] = {}
-        temp_transition_requirements: Dict[str, ConfigTransitionRequirement] = {}
-        for transition in game_config['transitionRequirements']:
-            temp_transition_requirements[transition['id']] = transition
-
-        for config_area in game_config['areas']:
-            curr_area = self.world.data_areas.get(config_area['id'])
-            if curr_area:
-                if ('exits' in config_area):
-                    for exit in config_area['exits']:
-                        their_id = exit['r_pointer']
-                        me_them_id = f"{curr_area.id}_to_{their_id}"
-                        if me_them_id not in exit_registration_tracker:
-                            # them_me
-                            transition = TransitionRequirement()
-                            if 'requirement' in exit:
-                                req_id = exit['requirement']['r_transitionRequirement']
-                                req_det = temp_transition_requirements.get(req_id)
-                                if req_det:
-                                    transition.unfufilled_description = loc.t(req_det['t_unfulfilled_description'])
-                                    transition.fulfilled_description = loc.t(req_det['t_fulfilled_description'])
-                                    req_items = req_det['fulfillCondition']['r_items']
-                                    for item in req_items:
-                                        transition.add_condition(item)
-                                    if 'isHiddenWhenUnfulfilled' in req_det:
-                                        transition.is_hidden_when_unfulfilled = req_det['isHiddenWhenUnfulfilled']
-                            
-                            our_exit = Exit(
-                                direction=exit['c_direction'],
-                                area=self.world.data_areas.get(their_id),
-                                areas=(curr_area, self.world.data_areas.get(their_id)),
-                                transitionRequirement=transition
-                            )
+    def load_data(self):
+        cache = WorldCache(self.cache_directory, [self.config_path, *loc.locale_files.values()])
+        if "--rebuild-cache" not in sys.argv:
+            world = cache.load(loc.current_lang)
+            if world is not None:
+                self.world = world
+                self.player = world.player
+                self.world.activate()
+                return None
 
-                            them_me_id = f"{their_id}_to_{curr_area.id}"
-                            exit_registration_tracker[them_me_id] = our_exit
-                            curr_area.exits.add(exit['c_direction'], our_exit)
-                        else:
-                            # me_them
-                            their_exit = exit_registration_tracker[me_them_id]
-                            their_area = their_exit.find_dest(curr_area)
-                            if their_area.config:
-                                if 'requirement' in their_area.config:
-                                    req_id = their_area.config['requirement']['r_transitionRequirement']
-                                    req_det = temp_transition_requirements.get(req_id)
-                                    if req_det:
-                                        req_items = req_det['fulfillCondition']['r_items']
-                                        for item in req_items:
-                                            their_exit.transitionRequirement.add_condition(item)
-                            curr_area.exits.add(exit['c_direction'], their_exit)
-                            exit_registration_tracker.pop(me_them_id, None)
-                            
-                if ('items' in config_area):
-                    for item in config_area['items']:
-                        self.world.data_items.has_get(item, lambda item: curr_area.items.add(item.id, item))
+        self.build_world()
+        cache.save(loc.current_lang, self.world)
 
-        # Load Commands
-        for cmd_group in loc.t('commands'):
-            for cmd in loc.t(f"commands.{cmd_group}"):
-                self.world.data_inputs.add(cmd, cmd_group)
-        
-        del exit_registration_tracker
-        del temp_transition_requirements
+    def start_session(self):
+        # The loaded world is only a template; a game plays a fresh session of it, with enemies spawned for this launch
+        self.world = self.world.new_session()
+        self.player = self.world.player
 
-        # Load Player
-        starting_area = self.world.data_areas.get_safe(game_config['general']['player']['startingState']['r_area'])
-        if starting_area is None:
-            gamePrint.abs_print("Could not find starting area.")
+    def build_world(self):
+        with open(self.config_path, 'rb') as f:
+            config_bytes = f.read()
+        game_config: GameConfig = json.loads(config_bytes)
+        try:
+            self.world = WorldLinker(game_config).link()
+        except LinkError as error:
+            gamePrint.abs_print("Could not load game configuration:")
+            for message in error.errors:
+                gamePrint.abs_print(f"  {message}")
+            gamePrint.flush()
             sys.exit(1)
-            return None
-        self.player = Player(
-            name="Evelyn",
-            current_area=starting_area,
-            hiding_safety=game_config['general']['player']['hidingSafety']
-        )
-        self.world.append_character(self.player)
-
-        # Load NPCs
-        for npc in game_config['npcs']:
-            npc_area = self.world.data_areas.get_safe(npc['r_area'])
-            if npc_area:
-                self.world.append_character(NPC(
-                    name=loc.t(npc['t_name']),
-                    dialog=loc.t(npc['t_dialog']),
-                    current_area=npc_area
-                ))
-
-        # Load Enemies
-        for enemy in game_config['enemies']:
-            roaming_group = self.world.data_groups.get_safe(enemy['r_roaming_group'])
-            if roaming_group:
-                random_area = roaming_group.areas.get_random([npc.current_area.id for npc in self.world.data_characters if isinstance(npc, NPC)])
-                if random_area:
-                    self.world.append_character(Enemy(
-                        name=enemy['id'],
-                        current_area=random_area,
-                        damage=enemy['damage'],
-                        damage_with_light=enemy['damageWithLight']
-                    ))
-
-        # Load Events
-        for event in game_config['events']:
-            trigger_type = event['trigger']['type']
-            command_group: str | None = None
-            to_add: Event | None = None
-
-            if trigger_type == 'enter':
-                command_group = 'go'
-                to_add = EnterEvent(
-                    id=event['id'],
-                    trigger_data=self.world.data_areas.get(event['trigger']['data']),
-                    additional_conditions=[],
-                    affects=[],
-                    once=event['once']
-                )
-            elif trigger_type == 'take':
-                command_group = 'take'
-                to_add = TakeEvent(
-                    id=event['id'],
-                    trigger_data=self.world.data_items.get(event['trigger']['data']),
-                    additional_conditions=[],
-                    affects=[],
-                    once=event['once']
-                )
-            elif trigger_type == 'examine':
-                command_group = 'examine'
-                to_add = ExamineEvent(
-                    id=event['id'],
-                    trigger_data=self.world.data_items.get(event['trigger']['data']),
-                    additional_conditions=[],
-                    affects=[],
-                    once=event['once']
-                )
-            elif trigger_type == 'use':
-                command_group = 'use'
-                to_add = UseEvent(
-                    id=event['id'],
-                    trigger_data=self.world.data_items.get(event['trigger']['data']),
-                    additional_conditions=[],
-                    affects=[],
-                    once=event['once']
-                )
-            elif trigger_type == 'throw':
-                command_group = 'throw'
-                to_add = ThrowEvent(
-                    id=event['id'],
-                    trigger_data=self.world.data_items.get(event['trigger']['data']),
-                    additional_conditions=[],
-                    affects=[],
-                    once=event['once']
-                )
-
-            if command_group is None or to_add is None:
-                continue
-                
-            if 'additional_conditions' in event:
-                for condition in event['additional_conditions']:
-                    to_add.additional_conditions.append(Condition(
-                        type=condition['type'],
-                        data=condition['data']
-                    ))
-
-            if 'affects' in event:
-                for affect in event['affects']:
-                    parsed_data: Any = None
-                    if affect['type'] == 'dialog':
-                        parsed_data = loc.t(affect['data'])
-                    elif affect['type'] == 'add_item_to_inventory':
-                        parsed_data = self.world.data_items.get(affect['data'])
-                    elif affect['type'] == 'take_item':
-                        parsed_data = self.world.data_items.get(affect['data'])
-                    elif affect['type'] == 'add_item_to_current_area':
-                        parsed_data = self.world.data_items.get(affect['data'])
-                    else:
-                        parsed_data = affect['data']
-
-                    to_add.affects.append(Affect(
-                        type=affect['type'],
-                        data=parsed_data
-                    ))
-
-            if self.world.data_triggers.has(command_group):
-                self.world.data_triggers.get(command_group).append(to_add)
-                continue
-
-            self.world.data_triggers.add(command_group, [to_add])
+        # Saves are only resumed in a world built from the same config
+        self.world.config_hash = hashlib.sha256(config_bytes).hexdigest()[:16]
+        self.player = self.world.player
 
     def ask_language(self):
-        supported_langs = loc.data_locale.keys()
+        supported_langs = loc.locale_files.keys()
         gamePrint.abs_print(f"What language would you like to play in? ({', '.join(supported_langs) })")
+        gamePrint.flush()
         lang = input()
         loc.set_locale(lang)
-        os.system('cls' if os.name == 'nt' else 'clear')
+        gamePrint.clear()
 
-    def run(self):
-        gamePrint.abs_print(loc.t("general.opening"), end="\r\n\r\n")
-        gamePrint.print(self.player.current_area.printable_enter_description)
-        self.world.handle_after_input()
+    def save_journal(self) -> Journal | None:
+        # python . --save=<name> keeps the game in saves/ and resumes it on the next start with the same name
+        name = arg_value("save", None)
+        if name is None:
+            return None
+        if not Journal.is_valid_id(name):
+            gamePrint.abs_print("Save names may only contain letters, digits and underscores.")
+            gamePrint.flush()
+            sys.exit(1)
+        return Journal(self.save_directory, name)
+
+    def run(self, journal: Journal | None = None):
+        if journal is not None and journal.exists():
+            try:
+                journal.resume(self.world)
+            except JournalError as error:
+                gamePrint.abs_print(f"{error} Start a new game with another --save name.")
+                gamePrint.flush()
+                sys.exit(1)
+            gamePrint.abs_print(loc.t("inputResponses.sessionResumed"), end="\r\n\r\n")
+            gamePrint.print(self.player.current_area.printable_enter_description)
+        else:
+            if journal is not None:
+                journal.start(self.world)
+            gamePrint.abs_print(loc.t("general.opening"), end="\r\n\r\n")
+            gamePrint.print(self.player.current_area.printable_enter_description)
+            self.after_input()
         while self.world.running:
             self.world.handle_pre_input()
             gamePrint.abs_print(f"\r\n{loc.t("inputResponses.waitingInput")}\r\n> ", end="")
+            gamePrint.flush()
             action = input()
             gamePrint.abs_print("")
             self.world.handle_input(action)
-            self.world.handle_after_input()
+            self.after_input()
         gamePrint.abs_print(loc.t("inputResponses.thankYou"))
+        gamePrint.flush()
         exit(0)
 
+    def after_input(self):
+        self.world.handle_after_input()
+        while self.world.pending_defenses:
+            words = self.world.prompt_defense()
+            self.world.resolve_defense(words, self.input_with_timeout(self.world.defense_timeout))
+        self.world.end_turn()
+
+    def input_with_timeout(self, timeout: float) -> str | None:
+        gamePrint.flush()
+        ready, _, _ = select.select([sys.stdin], [], [], timeout)
+        if ready:
+            return sys.stdin.readline()
+        return None
+
+    def serve(self):
+        # Sessions share one linked world per language and only hold their own state
+        from src.classes.Servers import GameServer
+        templates: Dict[str, World] = {}
+        def new_world() -> World:
+            if loc.current_lang not in templates:
+                self.load_data()
+                templates[loc.current_lang] = self.world
+            return templates[loc.current_lang].new_session()
+
+        GameServer(
+            new_world, arg_value("host", '127.0.0.1'), int(arg_value("port", 4000)), save_directory=self.save_directory,
+            save_days=float(arg_value("save-days", 30)), max_saves=int(arg_value("max-saves", 10000)),
+        ).run()
+
+    def headless(self):
+        # python . headless <script>... [--seed=N] [--repeat=N] [--transcript]
+        from src.tools.Headless import headless_report, play_script, read_script
+        paths = [arg for arg in sys.argv[sys.argv.index("headless") + 1:] if not arg.startswith("--")]
+        seed = int(arg_value("seed", 0))
+        repeat = int(arg_value("repeat", 1))
+        self.load_data()
+        results = [
+            play_script(self.world, path, read_script(path), seed + run)
+            for path in paths
+            for run in range(repeat)
+        ]
+        if "--transcript" in sys.argv:
+            for result in results:
+                gamePrint.abs_print(result.transcript)
+        gamePrint.abs_print("\n".join(headless_report(results)))
+
+    def monte_carlo(self):
+        # python . monte-carlo [<script>...] [--sessions=N] [--processes=N] [--turns=N] [--seed=N] [--defense=0.5]
+        # Without scripts every session is played by a random player
+        from src.tools.MonteCarlo import monte_carlo, monte_carlo_report
+        from src.tools.Headless import read_script
+        paths = [arg for arg in sys.argv[sys.argv.index("monte-carlo") + 1:] if not arg.startswith("--")]
+        processes = int(arg_value("processes", os.cpu_count() or 1))
+        turns = int(arg_value("turns", 500))
+        self.load_data()
+        start = time.perf_counter()
+        result = monte_carlo(
+            self.world, int(arg_value("sessions", 1000)), processes, turns, int(arg_value("seed", 0)),
+            float(arg_value("defense", 0.5)), [read_script(path) for path in paths],
+        )
+        gamePrint.abs_print("\n".join(monte_carlo_report(self.world, result, time.perf_counter() - start, processes, turns)))
+
+    def combat_sim(self):
+        # python . combat-sim [--damage=30,40] [--damage-with-light=20] [--light-count=5,15] [--players=N] [--turns=N]
+        #                     [--hide=0.2] [--defend=0] [--relight=0.1] [--encounter=P] [--seed=N]
+        # Grid values left out are the ones the config uses; encounter defaults to an estimate from the config's enemies
+        from src.tools.CombatSimulator import combat_available, combat_defaults, combat_grid, combat_policy, combat_report, simulate_combat
+        if not combat_available():
+            gamePrint.abs_print("The combat simulator needs NumPy: pip install numpy")
+            return None
+        with open(self.config_path, 'r') as f:
+            config: GameConfig = json.load(f)
+        values = combat_defaults(config)
+        for key in values:
+            given = arg_value(key.replace('_', '-'), None)
+            if given is not None:
+                values[key] = [int(value) for value in given.split(",")]
+        policy = combat_policy(config, **{name: float(arg_value(name, default)) for name, default in (('hide', 0.2), ('defend', 0.0), ('relight', 0.1))})
+        policy.encounter = float(arg_value("encounter", policy.encounter))
+        turns = int(arg_value("turns", 500))
+        start = time.perf_counter()
+        result = simulate_combat(combat_grid(values), policy, int(arg_value("players", 100000)), turns, int(arg_value("seed", 0)))
+        result.seconds = time.perf_counter() - start
+        gamePrint.abs_print("\n".join(combat_report(result, policy, turns)))
+
+    def memory_report(self):
+        from src.tools.MemoryReport import memory_report
+        def build() -> World:
+            self.build_world()
+            return self.world
+        gamePrint.abs_print("\n".join(memory_report(build)))
+
+    def solvability_report(self):
+        # python . solvability-report [--world=<dir>] [--processes=N] [--max-states=N]
+        from src.tools.SolvabilityReport import solvability_report
+        self.load_data()
+        gamePrint.abs_print("\n".join(solvability_report(self.world, int(arg_value("processes", 1)), int(arg_value("max-states", 200000)))))
+
+    def generate(self):
+        # python . generate --areas=N --out=<dir> [--seed=N]
+        from src.tools.WorldGenerator import generate_world, write_world
+        area_count = int(arg_value("areas", 1000))
+        directory = arg_value("out", f"./worlds/{area_count}")
+        write_world(directory, *generate_world(area_count, int(arg_value("seed", 0)), self.config_path, loc.locale_files['en']))
+        gamePrint.abs_print(f"Wrote a world of {area_count} areas to {directory}, play it with: python . --world={directory}")
+
+    def scaling_report(self):
+        # python . scaling-report [--sizes=100,1000,10000] [--turns=N] [--out=<dir>]
+        from src.tools.ScalingReport import scaling_report
+        sizes = [int(size) for size in arg_value("sizes", "100,1000,10000,100000").split(",")]
+        def load(directory: str) -> World:
+            game = Game(directory)
+            game.build_world()
+            return game.world
+        lines = scaling_report(sizes, arg_value("out", "./worlds"), load, int(arg_value("turns", 200)), int(arg_value("seed", 0)))
+        gamePrint.abs_print("\n".join(lines))
+
     def mode(self):
         # Development mode
         if "dev" in sys.argv:
             gamePrint.abs_print("Running in development mode.")
             self.player.current_area = self.world.data_areas.get("church")
-            self.player.inventory.add("knife", self.world.data_items.get("knife"))
-            self.player.inventory.add("libraryKey", self.world.data_items.get("libraryKey"))
-            self.player.inventory.add("mansionKey", self.world.data_items.get("mansionKey"))
-            self.player.inventory.add("cleansingGadget", self.world.data_items.get("cleansingGadget"))
+            self.player.inventory.add(self.world.data_items.get("knife"))
+            self.player.inventory.add(self.world.data_items.get("libraryKey"))
+            self.player.inventory.add(self.world.data_items.get("mansionKey"))
+            self.player.inventory.add(self.world.data_items.get("cleansingGadget"))
+
+def arg_value(name: str, default: Any) -> Any:
+    return next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith(f"--{name}=")), default)
 
 def main():
-    game = Game()
-    game.ask_language()
+    if "generate" in sys.argv:
+        Game().generate()
+        return None
+    if "scaling-report" in sys.argv:
+        Game().scaling_report()
+        return None
+    game = Game(arg_value("world", None))
+    if "serve" in sys.argv:
+        game.serve()
+        return None
+    if "memory-report" in sys.argv:
+        game.memory_report()
+        return None
+    if "headless" in sys.argv:
+        game.headless()
+        return None
+    if "combat-sim" in sys.argv:
+        game.combat_sim()
+        return None
+    if "monte-carlo" in sys.argv:
+        game.monte_carlo()
+        return None
+    if "solvability-report" in sys.argv:
+        game.solvability_report()
+        return None
+    journal = game.save_journal()
+    if journal is not None and journal.exists():
+        loc.set_locale(journal.language())
+    else:
+        game.ask_language()
     game.load_data()
+    game.start_session()
     game.mode()
-    game.run()
+    game.run(journal)
 
 if __name__ == "__main__":
     if "clear" in sys.argv:
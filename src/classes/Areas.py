@@ -1,43 +1,64 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
-from src.classes.Characters import Character, Player
-from src.classes.Items import Item
+from typing import List, Tuple
+from src.classes.Characters import Character
+from src.classes.Items import Item, ItemSet
 from src.classes.DataStores import NamableDataStore
-from src.types.ConfigTypes import ConfigArea
+from src.classes.States import active_state
 from src.singletons.GamePrint import gamePrint
 from src.singletons.Locale import locale as loc
 
-@dataclass
+@dataclass(slots=True)
 class TransitionRequirement:
-    conditions: Dict[str, bool] = field(default_factory=dict) # str is item id
+    id: int
+    need: ItemSet # Every item that has to be used on the exit
     unfufilled_description: str = ""
     fulfilled_description: str = ""
     is_hidden_when_unfulfilled: bool = False
-    
+
+    @property
+    def remaining(self) -> int:
+        # The items of need not used yet, as a mask counted from need.base
+        return active_state().requirements.get(self.id, self.need.mask)
+
     @property
     def is_met(self) -> bool:
-        return all(self.conditions.values())
-    
+        return not self.remaining
+
+    def can_open(self, inventory: ItemSet) -> bool:
+        # Whether inventory holds every item still missing
+        return inventory.covers(self.remaining, self.need.base)
+
+    def helps_open(self, inventory: ItemSet) -> bool:
+        return inventory.intersects(self.remaining, self.need.base)
+
+    def missing(self) -> List[Item]:
+        return ItemSet(self.need.index, self.need.base, self.remaining).values()
+
     def check(self, item: Item) -> bool:
-        if item.id in self.conditions:
-            self.conditions[item.id] = True
+        if self.need.holds(item):
+            state = active_state()
+            state.requirements[self.id] = self.remaining & ~(1 << (item.index - self.need.base))
+            state.record('condition', self.id, item.id)
+            if self.is_met:
+                state.open_requirement(self.id)
             return True
         return False
     
     def force_fulfill(self):
-        for key in self.conditions.keys():
-            self.conditions[key] = True
+        active_state().requirements[self.id] = 0
+        active_state().record('fulfil', self.id)
+        active_state().open_requirement(self.id)
 
-    def add_condition(self, item_id: str):
-        self.conditions[item_id] = False
+    def add_condition(self, item: Item):
+        self.need.add(item)
 
-@dataclass
+@dataclass(slots=True)
 class Exit:
     direction: str
     area: Area
     areas: Tuple[Area, Area]
-    transitionRequirement: TransitionRequirement = field(default_factory=TransitionRequirement)
+    transitionRequirement: TransitionRequirement
 
     def find_dest(self, current_area: Area) -> Area:
         return self.areas[0] if current_area == self.areas[1] else self.areas[1]
@@ -47,27 +68,53 @@ class Exit:
             return self.find_dest(current_area)
         return None
 
-@dataclass
+@dataclass(slots=True)
 class Area:
     id: str
     name: str
     enter_description: str
-    config: ConfigArea
     require_light: bool
     is_hidable: bool
+    default_items: ItemSet
     exits: NamableDataStore[Exit] = field(default_factory=NamableDataStore[Exit])
-    items: NamableDataStore[Item] = field(default_factory=NamableDataStore[Item])
-    characters: List[Character] = field(default_factory=list[Character])
     groups: List[Group] = field(default_factory=list)
+    index: int = -1 # Position in World.data_graph
+
+    @property
+    def items(self) -> ItemSet:
+        return active_state().area_items.get(self.id, self.default_items)
+
+    def edit_items(self) -> ItemSet:
+        # Copy on first write so the shared template is never modified by a session
+        area_items = active_state().area_items
+        if self.id not in area_items:
+            area_items[self.id] = self.default_items.copy()
+        active_state().invalidate((self.index,))
+        return area_items[self.id]
+
+    @property
+    def characters(self) -> List[Character]:
+        state = active_state()
+        characters = state.area_characters.get(self.id, [])
+        if state.has_enemies(self.index):
+            return characters + state.enemies.enemies_in(self.index)
+        return characters
 
     @property
     def printable_enter_description(self) -> str:
+        # Rendered once per session and language, until WorldState.invalidate is called for this area
+        descriptions = active_state().descriptions.setdefault(self.index, {})
+        if loc.current_lang not in descriptions:
+            descriptions[loc.current_lang] = self.render_enter_description()
+        return descriptions[loc.current_lang]
+
+    def render_enter_description(self) -> str:
         printable = self.enter_description + " "
         items = loc.conjunction_list([f"{item.name}" for item in self.items.values() if not item.is_hidden])
         if items:
             printable += loc.t("inputResponses.areaListItems", items=items)
         exits = loc.conjunction_list([loc.t("inputResponses.dirToDest", dir=dir, dest=target.find_dest(self).name) for dir, target in self.exits.items() if target.transitionRequirement.is_met or not target.transitionRequirement.is_hidden_when_unfulfilled])
-        characters = loc.conjunction_list([f"{char.name}" for char in self.characters if not isinstance(char, Player)])
+        characters = loc.conjunction_list([f"{char.name}" for char in self.characters if char.shown_in_area])
         if characters:
             printable += loc.t("inputResponses.areaListItems", items=characters)
         if exits:
@@ -85,7 +132,7 @@ class Area:
                 gamePrint.abs_print(exit.transitionRequirement.fulfilled_description)
         return is_used
 
-@dataclass
+@dataclass(slots=True)
 class Group:
     id: str
     name: str
@@ -0,0 +1,50 @@
+from __future__ import annotations
+import glob
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import List, TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.classes.World import World
+
+@dataclass
+class WorldCache:
+    # A fully linked World per locale, so start up can skip linking
+    # Keyed by a hash of the config, the locale files and the class files, so editing any of them rebuilds it
+    directory: str
+    sources: List[str] = field(default_factory=list)
+
+    def key(self, lang: str) -> str:
+        digest = hashlib.sha256(lang.encode())
+        # The class files next to this one, wherever the game was started from
+        for path in self.sources + sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+            with open(path, 'rb') as f:
+                digest.update(path.encode())
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def path(self, lang: str) -> str:
+        return os.path.join(self.directory, f"world.{lang}.{self.key(lang)}.pickle")
+
+    def load(self, lang: str) -> World | None:
+        try:
+            with open(self.path(lang), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+    def save(self, lang: str, world: World):
+        path = self.path(lang)
+        try:
+            data = pickle.dumps(world, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError):
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(self.directory, f"world.{lang}.*.pickle")):
+            os.remove(stale)
+        # Write then rename so a concurrent reader never sees a partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
@@ -1,17 +1,19 @@
 from __future__ import annotations
 from dataclasses import dataclass
+import copy
 import random
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
-    from src.classes.Areas import Area
-from src.classes.DataStores import NamableDataStore
-from src.classes.Items import Item
+    from src.classes.Areas import Area, Group
+from src.classes.Items import ItemSet
+from src.classes.States import active_state
 from src.singletons.GamePrint import gamePrint
 from src.singletons.Locale import locale as loc
 
 class Character:
     __current_area: Area
     name: str
+    shown_in_area = True # Listed in the enter description of the area it is in
     
     @property
     def current_area(self):
@@ -19,19 +21,23 @@ class Character:
 
     @current_area.setter
     def current_area(self, value: Area):
-        self.__current_area.characters.remove(self)
+        active_state().move_character(self, self.__current_area, value)
         self.__current_area = value
-        self.__current_area.characters.append(self)
 
     def __init__(self, name: str, current_area: Area):
         self.__current_area = current_area
         self.name = name
 
+    def spawn(self) -> Character:
+        # A copy of this character for a new session, starting where this one is
+        return copy.copy(self)
+
     def move_adjacent(self, direction: str | None):
         if direction is None:
-            # Move to a random adjacent room
-            exit = random.choice(self.current_area.exits.values())
-            self.current_area = exit.find_dest(self.current_area)
+            # Move to a random adjacent room, if there is one
+            exit = self.current_area.exits.get_random()
+            if exit is not None:
+                self.current_area = exit.find_dest(self.current_area)
         else:
             if self.current_area.exits.has(direction):
                 exit = self.current_area.exits.get(direction)
@@ -40,16 +46,22 @@ class Character:
                 gamePrint.abs_print(loc.t("inputResponses.cannotGo", dir=direction))
 
 class Player(Character):
+    shown_in_area = False
     max_health = 100
     __health = max_health
 
-    def __init__(self, name: str, current_area: Area, hiding_safety: int):
+    def __init__(self, name: str, current_area: Area, hiding_safety: int, inventory: ItemSet):
         super().__init__(name, current_area)
-        self.inventory = NamableDataStore[Item]()
+        self.inventory = inventory
         self.lantern_count = 0
         self.is_hiding = False
         self.hiding_safety = hiding_safety
 
+    def spawn(self) -> Player:
+        player = copy.copy(self)
+        player.inventory = self.inventory.copy()
+        return player
+
     @property
     def health(self):
         return self.__health
@@ -62,6 +74,13 @@ class Player(Character):
         else:
             gamePrint.abs_print(loc.t("inputResponses.healthStatus", health=self.__health), end=" ")
 
+    def restore(self, area: Area, health: int, lantern_count: int, is_hiding: bool):
+        # Sets saved values without the messages the setters print
+        self.current_area = area
+        self.__health = health
+        self.lantern_count = lantern_count
+        self.is_hiding = is_hiding
+
     def take_damage(self, enemy: Enemy):
         
         final_dmg = 0
@@ -100,8 +119,21 @@ class NPC(Character):
 class Enemy(Character):
     damage: int
     damage_with_light: int
+    roaming_group: Group
+    slot: int = -1 # Index into World.data_horde; positions live in the session's HordeState
 
-    def __init__(self, name: str, current_area: Area, damage: int, damage_with_light: int):
-        super().__init__(name, current_area)
+    def __init__(self, name: str, current_area: Area, damage: int, damage_with_light: int, roaming_group: Group):
+        self.name = name
+        self.start_area = current_area
         self.damage = damage
-        self.damage_with_light = damage_with_light
\ No newline at end of file
+        self.damage_with_light = damage_with_light
+        self.roaming_group = roaming_group
+
+    @property
+    def current_area(self) -> Area:
+        return active_state().enemies.area_of(self)
+
+    @current_area.setter
+    def current_area(self, value: Area):
+        state = active_state()
+        state.invalidate(state.enemies.move(self, value))
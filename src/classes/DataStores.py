@@ -1,16 +1,127 @@
 from dataclasses import dataclass, field
 import random
-from typing import Callable, Dict, Generic, List, TypeVar
+from typing import Callable, Collection, Dict, Generic, ItemsView, KeysView, List, Tuple, TypeVar, ValuesView
+from src.classes.Parsers import NameResolver
 
 
 T = TypeVar('T')
 
+ADD, REMOVE = 'add', 'remove'
+
+@dataclass(slots=True)
+class KeySampler:
+    # A store's keys in an array so a random one is an index away; removing a key moves the last one into its place
+    # Once any key is weighted, the weights sit in a Fenwick tree so weighted picks and changes take O(log n)
+    keys: List[str] = field(default_factory=list)
+    positions: Dict[str, int] = field(default_factory=dict) # key -> index in keys
+    weights: List[float] | None = None
+    tree: List[float] | None = None # 1-based: tree[i] sums the weights of keys i - (i & -i) to i - 1
+
+    def changed(self, version: int, change: str, key: str, value: object):
+        if change == ADD:
+            self.add(key)
+        else:
+            self.remove(key)
+
+    def add(self, key: str):
+        if key in self.positions:
+            return
+        self.positions[key] = len(self.keys)
+        self.keys.append(key)
+        if self.weights is not None:
+            self.weights.append(1.0)
+            self.grow()
+
+    def remove(self, key: str):
+        position = self.positions.pop(key, None)
+        if position is None:
+            return
+        last = self.keys.pop()
+        if self.weights is not None:
+            weight = self.weights.pop()
+            self.tree.pop()
+        if position < len(self.keys):
+            self.keys[position] = last
+            self.positions[last] = position
+            if self.weights is not None:
+                self.change(position, weight - self.weights[position])
+                self.weights[position] = weight
+
+    def set_weight(self, key: str, weight: float):
+        if self.weights is None:
+            self.weights, self.tree = [], [0.0]
+            for _ in self.keys:
+                self.weights.append(1.0)
+                self.grow()
+        position = self.positions[key]
+        self.change(position, weight - self.weights[position])
+        self.weights[position] = weight
+
+    def grow(self):
+        # Fills in the tree node of the weight just appended from the prefix sums before it
+        i = len(self.weights)
+        self.tree.append(self.weights[-1] + self.prefix(i - 1) - self.prefix(i - (i & -i)))
+
+    def change(self, position: int, delta: float):
+        i = position + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count: int) -> float:
+        # Total weight of the first count keys
+        total = 0.0
+        while count:
+            total += self.tree[count]
+            count -= count & -count
+        return total
+
+    def find(self, target: float) -> int:
+        # Position of the key whose share of the running total covers target
+        position, step = 0, 1 << (len(self.keys).bit_length() - 1)
+        while step:
+            if position + step < len(self.tree) and self.tree[position + step] <= target:
+                position += step
+                target -= self.tree[position]
+            step >>= 1
+        return min(position, len(self.keys) - 1)
+
+    def pick(self, exclude: Collection[str] = ()) -> str | None:
+        # A random key not in exclude, by weight once any is set, or None when every key is excluded
+        # Costs O(m log m) in the m excluded keys, whatever the number of keys
+        skipped = sorted({self.positions[key] for key in exclude if key in self.positions})
+        if self.weights is None:
+            count = len(self.keys) - len(skipped)
+            if count <= 0:
+                return None
+            # Keys are counted as if the skipped ones were not there, so every skipped key at or before the pick shifts it by one
+            chosen = random.randrange(count)
+            for position in skipped:
+                if position > chosen:
+                    break
+                chosen += 1
+            return self.keys[chosen]
+        total = self.prefix(len(self.keys)) - sum(self.weights[position] for position in skipped)
+        if total <= 0:
+            return None
+        # The same shift, by weight: every skipped key whose range starts at or before the pick pushes it past that range
+        target = random.random() * total
+        for position in skipped:
+            if self.prefix(position) > target:
+                break
+            target += self.weights[position]
+        return self.keys[self.find(target)]
+
 @dataclass
 class DataStore(Generic[T]):
     data: Dict[str, T] = field(default_factory=dict)
+    version: int = 0 # Counts adds and removes, so a derived index can tell whether it is stale
+    subscribers: Tuple[Callable[[int, str, str, T], None], ...] = field(default=(), repr=False, compare=False) # called with version, ADD or REMOVE, key and value
+    sampler: KeySampler | None = field(default=None, repr=False, compare=False) # Built by the first get_random or set_weight, then a subscriber
 
     def add(self, key: str, value: T):
         self.data[key] = value
+        self.notify(ADD, key, value)
 
     def get(self, key: str) -> T:
         return self.data[key]
@@ -29,32 +140,58 @@ class DataStore(Generic[T]):
         return self.data
     
     def remove(self, key: str):
-        del self.data[key]
+        value = self.data.pop(key)
+        self.notify(REMOVE, key, value)
 
-    def values(self) -> list[T]:
-        return list(self.data.values())
+    def subscribe(self, callback: Callable[[int, str, str, T], None]):
+        # Stores are pickled with the world cache, so callback should be a bound method or module function
+        # A new tuple each time keeps most stores, which nothing watches, to one shared empty one
+        self.subscribers = (*self.subscribers, callback)
+
+    def unsubscribe(self, callback: Callable[[int, str, str, T], None]):
+        self.subscribers = tuple(subscriber for subscriber in self.subscribers if subscriber != callback)
+
+    def notify(self, change: str, key: str, value: T):
+        self.version += 1
+        for callback in self.subscribers:
+            callback(self.version, change, key, value)
+
+    # Live views of the store rather than copies; copy them before adding or removing while iterating
+    def values(self) -> ValuesView[T]:
+        return self.data.values()
     
-    def keys(self) -> list[str]:
-        return list(self.data.keys())
+    def keys(self) -> KeysView[str]:
+        return self.data.keys()
     
-    def items(self) -> list[tuple[str, T]]:
-        return list(self.data.items())
+    def items(self) -> ItemsView[str, T]:
+        return self.data.items()
 
-    def get_random(self, do_not_include: List[str] = []) -> T | None:
-        if len(self.data) == 0:
-            return None
-        random_key_list = [key for key in self.data.keys() if key not in do_not_include]
-        random_key = random.choice(random_key_list)
-        return self.data[random_key]
+    def key_sampler(self) -> KeySampler:
+        if self.sampler is None:
+            sampler = KeySampler()
+            for key in self.data:
+                sampler.add(key)
+            self.sampler = sampler
+            self.subscribe(sampler.changed)
+        return self.sampler
+
+    def set_weight(self, key: str, weight: float):
+        # From then on get_random picks keys in proportion to their weights, 1 unless set
+        self.key_sampler().set_weight(key, weight)
+
+    def get_random(self, exclude: Collection[str] = ()) -> T | None:
+        key = self.key_sampler().pick(exclude)
+        return None if key is None else self.data[key]
     
 @dataclass
 class NamableDataStore(DataStore[T]):
     name_to_id: Dict[str, str] = field(default_factory=dict)
+    resolver: NameResolver | None = field(default=None, repr=False, compare=False) # Built by the first find_by_name, then a subscriber
 
     def add(self, key: str, value: T):
-        super().add(key, value)
         name = getattr(value, 'name', None)
         if name: self.name_to_id[name.lower()] = key
+        super().add(key, value)
 
     def get_by_name(self, name: str) -> T | None:
         id = self.name_to_id.get(name.lower())
@@ -64,6 +201,21 @@ class NamableDataStore(DataStore[T]):
     def has_by_name(self, name: str) -> bool:
         return name.lower() in self.name_to_id
 
+    def name_resolver(self) -> NameResolver:
+        if self.resolver is None:
+            resolver = self.resolver = NameResolver.of(self.name_to_id)
+            self.subscribe(resolver.changed)
+        return self.resolver
+
+    def find_by_name(self, text: str) -> T | None:
+        # Like get_by_name, but forgiving articles, aliases, prefixes and typos
+        found = self.get_by_name(text)
+        if found is None:
+            names = self.name_resolver().resolve(text, 1)
+            if names:
+                found = self.get_by_name(names[0])
+        return found
+
     def has_get_by_name(self, name: str, func: Callable[[T], None]):
         item = self.get_by_name(name.lower())
         if item is not None:
@@ -71,8 +223,8 @@ class NamableDataStore(DataStore[T]):
 
     def remove(self, key: str):
         name = getattr(self.get(key), 'name', None)
-        super().remove(key)
         if name: self.name_to_id.pop(name.lower(), None)
+        super().remove(key)
 
     def remove_by_name(self, name: str):
         id = self.name_to_id.get(name.lower(), None)
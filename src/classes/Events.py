@@ -1,6 +1,7 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, TYPE_CHECKING
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Tuple, TYPE_CHECKING
 from src.classes.Areas import Area
 if TYPE_CHECKING:
     from src.classes.World import World
@@ -8,88 +9,122 @@ from src.classes.Items import Item
 from typing import Any
 from src.singletons.GamePrint import gamePrint
 
-@dataclass
-class Information:
-    type: str
-    data: Any
-
-class Condition(Information):
-    def check_condition(self, world: World):
-        match self.type:
-            case 'inventory_has':
-                return world.player.inventory.has(self.data)
-            case 'area':
-                return world.player.current_area.id == self.data
-
-class Affect(Information):
-    def apply_affect(self, world: World):
-        match self.type:
-            case 'end_game':
-                world.running = False
-            case 'dialog':
-                gamePrint.abs_print(self.data)
-            case 'add_item_to_inventory':
-                world.player.inventory.add(self.data.id, self.data)
-            case 'take_item':
-                if world.player.current_area.items.has(self.data.id):
-                    world.player.inventory.add(self.data.id, self.data)
-                    world.player.current_area.items.remove(self.data.id)
-            case 'add_item_to_current_area':
-                world.player.current_area.items.add(self.data.id, self.data)
-            case 'force_meet_condition_in_current_area':
-                exit = world.player.current_area.exits.has(self.data)
-                if exit:
-                    target_exit = world.player.current_area.exits.get(self.data)
-                    target_exit.transitionRequirement.force_fulfill()
-                    gamePrint.abs_print(target_exit.transitionRequirement.fulfilled_description)
-
-@dataclass
+# Conditions and affects are compiled once at load into a module-level function with its data bound by partial,
+# so running one is a single call and the compiled world still pickles into the cache
+Check = Callable[['World'], bool]
+Effect = Callable[['World'], None]
+
+def player_in_area(area: Area, world: World) -> bool:
+    return world.player.current_area is area
+
+def player_has_item(item: Item, world: World) -> bool:
+    return world.player.inventory.holds(item)
+
+def end_game(_: Any, world: World):
+    world.end_game()
+
+def show_dialog(text: str, world: World):
+    gamePrint.abs_print(text)
+
+def give_item(item: Item, world: World):
+    world.give_item(item)
+
+def take_item(item: Item, world: World):
+    if world.player.current_area.items.holds(item):
+        world.take_item(item, world.player.current_area)
+
+def place_item(item: Item, world: World):
+    world.place_item(item, world.player.current_area)
+
+def fulfil_exit(direction: str, world: World):
+    exit = world.player.current_area.exits.get_safe(direction)
+    if exit is not None:
+        exit.transitionRequirement.force_fulfill()
+        gamePrint.abs_print(exit.transitionRequirement.fulfilled_description)
+
+CONDITIONS: Dict[str, Callable[[Any, World], bool]] = {
+    'inventory_has': player_has_item,
+    'area': player_in_area,
+}
+AFFECTS: Dict[str, Callable[[Any, World], None]] = {
+    'end_game': end_game,
+    'dialog': show_dialog,
+    'add_item_to_inventory': give_item,
+    'take_item': take_item,
+    'add_item_to_current_area': place_item,
+    'force_meet_condition_in_current_area': fulfil_exit,
+}
+
+def compile_condition(type: str, data: Any) -> Check:
+    return partial(CONDITIONS[type], data)
+
+def compile_affect(type: str, data: Any) -> Effect:
+    return partial(AFFECTS[type], data)
+
+@dataclass(slots=True)
 class Event:
     id: str
     trigger_data: Any
-    additional_conditions: List[Condition]
-    affects: List[Affect]
+    additional_conditions: List[Check]
+    affects: List[Effect]
     once: bool
-    has_run: bool = False
-
-    def should_run(self):
-        if not self.has_run:
-            self.has_run = True
-            return True
-        return not self.once
 
     def check_conditions(self, target: Any, world: World):
-        if not self.should_run():
+        if self.once and self.id in world.state.fired_events:
             return False
         if target.__class__ != self.trigger_data.__class__:
             return False
         if target.id != self.trigger_data.id:
             return False
-        for condition in self.additional_conditions:
-            if not condition.check_condition(world):
+        for check in self.additional_conditions:
+            if not check(world):
                 return False
         return True
 
     def apply_affects(self, world: World):
+        world.state.fired_events.add(self.id)
+        world.state.record('event', self.id)
         for affect in self.affects:
-            affect.apply_affect(world)
+            affect(world)
 
-@dataclass
+@dataclass(slots=True)
 class TakeEvent(Event):
     trigger_data: Item
 
-@dataclass
+@dataclass(slots=True)
 class EnterEvent(Event):
     trigger_data: Area
 
-@dataclass
+@dataclass(slots=True)
 class ExamineEvent(Event):
     trigger_data: Item
 
-@dataclass
+@dataclass(slots=True)
 class UseEvent(Event):
     trigger_data: Item
 
-@dataclass
+@dataclass(slots=True)
 class ThrowEvent(Event):
-    trigger_data: Item
\ No newline at end of file
+    trigger_data: Item
+
+@dataclass(slots=True)
+class EventIndex:
+    # Shared by every session; fired one-shot events are skipped through the session's fired_events
+    data: Dict[Tuple[str, str], List[Event]] = field(default_factory=dict) # (trigger, target id)
+
+    def add(self, trigger: str, event: Event):
+        self.data.setdefault((trigger, event.trigger_data.id), []).append(event)
+
+    def has(self, trigger: str, target: Any) -> bool:
+        return (trigger, target.id) in self.data
+
+    def dispatch(self, trigger: str, target: Any, world: World) -> bool:
+        events = self.data.get((trigger, target.id))
+        if not events:
+            return False
+        is_used = False
+        for event in events:
+            if event.check_conditions(target, world):
+                is_used = True
+                event.apply_affects(world)
+        return is_used
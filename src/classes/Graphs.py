@@ -0,0 +1,32 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Iterable, List
+from src.classes.Areas import Area, Exit
+
+@dataclass(slots=True)
+class AreaGraph:
+    # Compressed sparse rows: the exits of areas[i] are edges offsets[i] to offsets[i + 1]
+    areas: List[Area] = field(default_factory=list)
+    offsets: List[int] = field(default_factory=lambda: [0])
+    targets: List[int] = field(default_factory=list) # area index each edge leads to
+    exits: List[Exit] = field(default_factory=list)
+    directions: List[str] = field(default_factory=list) # direction each edge is taken in from its area
+
+    @classmethod
+    def from_areas(cls, areas: Iterable[Area]) -> AreaGraph:
+        graph = cls(list(areas))
+        for i, area in enumerate(graph.areas):
+            area.index = i
+        for area in graph.areas:
+            for direction, exit in area.exits.items():
+                graph.targets.append(exit.find_dest(area).index)
+                graph.exits.append(exit)
+                graph.directions.append(direction)
+            graph.offsets.append(len(graph.targets))
+        return graph
+
+    def edges(self, area: Area) -> range:
+        return range(self.offsets[area.index], self.offsets[area.index + 1])
+
+    def degree(self, area: Area) -> int:
+        return self.offsets[area.index + 1] - self.offsets[area.index]
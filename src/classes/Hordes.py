@@ -0,0 +1,219 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+import random
+from typing import Any, Dict, Iterable, List, Set, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.classes.Areas import Area
+    from src.classes.Characters import Enemy
+    from src.classes.Graphs import AreaGraph
+
+# Below this many enemies a NumPy call costs more than stepping them one at a time
+BATCH_THRESHOLD = 32
+np = None # NumPy once load_numpy imported it
+
+def load_numpy() -> bool:
+    # Importing NumPy takes a good part of start up, so only hordes big enough to batch pay for it
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError: # Enemies are then stepped one at a time
+            return False
+        np = numpy
+    return True
+
+@dataclass(slots=True)
+class Horde:
+    # Shared by every session: the enemies and the moves each may make, as CSR rows per (roaming group, allowed area)
+    # Only areas a group may enter get a row, so the tables grow with the groups' sizes rather than groups x areas
+    enemies: List[Enemy] = field(default_factory=list)
+    areas: List[Area] = field(default_factory=list)
+    groups: Any = field(default_factory=list) # enemy slot -> roaming group number
+    start: Any = field(default_factory=list) # enemy slot -> area index it spawns in when its group has no area to draw from
+    spawn_first: Any = field(default_factory=list) # enemy slot -> first row of the areas it may spawn in
+    spawn_count: Any = field(default_factory=list) # enemy slot -> how many rows follow spawn_first
+    row_keys: Any = field(default_factory=list) # row -> group * len(areas) + area index, sorted
+    row_areas: Any = field(default_factory=list) # row -> area index, sorted within each group
+    group_offsets: Any = field(default_factory=lambda: [0]) # group -> its first row
+    move_offsets: Any = field(default_factory=lambda: [0]) # row -> its first move
+    move_targets: Any = field(default_factory=list) # area indexes
+    row_of: Dict[int, int] = field(default_factory=dict) # row key -> row, when not batched
+    batched: bool = False
+
+    def add(self, enemy: Enemy):
+        enemy.slot = len(self.enemies)
+        self.enemies.append(enemy)
+
+    def build(self, graph: AreaGraph, no_go: Set[int]):
+        # no_go holds the area indexes enemies must never enter, i.e. where NPCs stand
+        self.areas = graph.areas
+        n = len(self.areas)
+        group_numbers = {}
+        for enemy in self.enemies:
+            group_numbers.setdefault(enemy.roaming_group.id, (len(group_numbers), enemy.roaming_group))
+        for number, group in group_numbers.values():
+            allowed = {area.index for area in group.areas.values()} - no_go
+            for area_index in sorted(allowed):
+                self.row_of[number * n + area_index] = len(self.row_keys)
+                self.row_keys.append(number * n + area_index)
+                self.row_areas.append(area_index)
+                self.move_targets.extend(graph.targets[edge] for edge in graph.edges(self.areas[area_index]) if graph.targets[edge] in allowed)
+                self.move_offsets.append(len(self.move_targets))
+            self.group_offsets.append(len(self.row_keys))
+        self.groups = [group_numbers[enemy.roaming_group.id][0] for enemy in self.enemies]
+        self.start = [enemy.start_area.index for enemy in self.enemies]
+        # An enemy spawns in any area its group may enter, which are exactly its group's rows
+        self.spawn_first = [self.group_offsets[group] for group in self.groups]
+        self.spawn_count = [self.group_offsets[group + 1] - self.group_offsets[group] for group in self.groups]
+        self.batched = len(self.enemies) >= BATCH_THRESHOLD and load_numpy()
+        if self.batched:
+            for name in ('groups', 'start', 'spawn_first', 'spawn_count', 'row_keys', 'row_areas', 'group_offsets', 'move_offsets', 'move_targets'):
+                setattr(self, name, np.asarray(getattr(self, name), dtype=np.intp))
+            self.row_of = {}
+
+    def lookup(self, groups: Any, area_indexes: Any) -> Tuple[Any, Any]:
+        # Batched: the row of each group and area, and whether that area is one the group may enter at all
+        keys = groups * len(self.areas) + area_indexes
+        rows = np.searchsorted(self.row_keys, keys)
+        rows[rows == len(self.row_keys)] = 0
+        return rows, self.row_keys[rows] == keys
+
+    def spawn(self) -> HordeState:
+        # Seeded from random so a seeded session spawns and steps its enemies the same way every run
+        if not self.batched:
+            positions = [
+                self.row_areas[first + random.randrange(count)] if count else start
+                for first, count, start in zip(self.spawn_first, self.spawn_count, self.start)
+            ]
+            state = HordeState(self, positions, [])
+        else:
+            # A horde loaded from a cached world comes with arrays but without this module having imported NumPy
+            load_numpy()
+            rng = np.random.default_rng(random.getrandbits(64))
+            positions = self.start.copy()
+            drawing = self.spawn_count > 0
+            picks = self.spawn_first[drawing] + (rng.random(int(drawing.sum())) * self.spawn_count[drawing]).astype(np.intp)
+            positions[drawing] = self.row_areas[picks]
+            state = HordeState(self, positions, None, rng)
+        state.recount()
+        return state
+
+@dataclass(slots=True)
+class HordeState:
+    # Per session: where each enemy of the shared horde is
+    horde: Horde
+    positions: Any # enemy slot -> area index
+    counts: Any # area index -> enemies there
+    rng: Any = None
+
+    def recount(self):
+        if not self.horde.batched:
+            self.counts = [0] * len(self.horde.areas)
+            for position in self.positions:
+                self.counts[position] += 1
+        else:
+            self.counts = np.bincount(self.positions, minlength=len(self.horde.areas))
+
+    def area_of(self, enemy: Enemy) -> Area:
+        return self.horde.areas[self.positions[enemy.slot]]
+
+    def move(self, enemy: Enemy, area: Area) -> Iterable[int]:
+        old = self.positions[enemy.slot]
+        self.counts[old] -= 1
+        self.counts[area.index] += 1
+        self.positions[enemy.slot] = area.index
+        return (old, area.index)
+
+    def enemies_in(self, area_index: int) -> List[Enemy]:
+        if not self.counts[area_index]:
+            return []
+        if not self.horde.batched:
+            slots = [slot for slot, position in enumerate(self.positions) if position == area_index]
+        else:
+            slots = np.flatnonzero(self.positions == area_index)
+        return [self.horde.enemies[slot] for slot in slots]
+
+    def roam(self, toward: List[int] | None = None) -> Iterable[int]:
+        # Every enemy moves along a random allowed exit, or stays if it has none
+        # With toward (next area to the player from each area) enemies take that step instead when they are allowed to
+        # Returns the areas an enemy left or entered
+        horde = self.horde
+        old = self.positions.copy()
+        if not horde.batched:
+            n = len(horde.areas)
+            for slot, position in enumerate(self.positions):
+                group = horde.groups[slot]
+                if toward is not None and toward[position] >= 0 and group * n + toward[position] in horde.row_of:
+                    self.positions[slot] = toward[position]
+                    continue
+                row = horde.row_of.get(group * n + position)
+                if row is not None and horde.move_offsets[row] < horde.move_offsets[row + 1]:
+                    self.positions[slot] = horde.move_targets[random.randrange(horde.move_offsets[row], horde.move_offsets[row + 1])]
+        else:
+            rows, found = horde.lookup(horde.groups, self.positions)
+            first = horde.move_offsets[rows]
+            degree = horde.move_offsets[rows + 1] - first
+            moving = found & (degree > 0)
+            if toward is not None:
+                steps = np.asarray(toward, dtype=np.intp)[self.positions]
+                chasing = (steps >= 0) & horde.lookup(horde.groups, steps)[1]
+                self.positions[chasing] = steps[chasing]
+                moving &= ~chasing
+            picks = first[moving] + (self.rng.random(int(moving.sum())) * degree[moving]).astype(np.intp)
+            self.positions[moving] = horde.move_targets[picks]
+        return self.moved(old)
+
+    def relocate(self, enemies: List[Enemy], avoid: int) -> Iterable[int]:
+        # Sends enemies to a random area of their roaming group other than avoid
+        horde = self.horde
+        old = self.positions.copy()
+        if not horde.batched:
+            n = len(horde.areas)
+            for enemy in enemies:
+                group = horde.groups[enemy.slot]
+                first = horde.group_offsets[group]
+                skip = group * n + avoid in horde.row_of
+                count = horde.group_offsets[group + 1] - first - skip
+                if count > 0:
+                    # As below: picking among the group's areas as if avoid were not there
+                    pick = first + random.randrange(count)
+                    if skip and horde.row_areas[pick] >= avoid:
+                        pick += 1
+                    self.positions[enemy.slot] = horde.row_areas[pick]
+        else:
+            slots = np.fromiter((enemy.slot for enemy in enemies), dtype=np.intp, count=len(enemies))
+            groups = horde.groups[slots]
+            first = horde.group_offsets[groups]
+            skips = horde.lookup(groups, np.full(len(slots), avoid, dtype=np.intp))[1]
+            count = horde.group_offsets[groups + 1] - first - skips
+            moving = count > 0
+            picks = first[moving] + (self.rng.random(int(moving.sum())) * count[moving]).astype(np.intp)
+            # A group's areas are sorted, so skipping avoid shifts every pick at or past it by one
+            picks += skips[moving] & (horde.row_areas[picks] >= avoid)
+            self.positions[slots[moving]] = horde.row_areas[picks]
+        return self.moved(old)
+
+    def changes(self, old: Any) -> List[int]:
+        # Flat slot, area index pairs for every enemy no longer where it was in old
+        if not self.horde.batched:
+            return [value for slot, (before, after) in enumerate(zip(old, self.positions)) if before != after for value in (slot, after)]
+        slots = np.flatnonzero(old != self.positions)
+        return np.column_stack((slots, self.positions[slots])).ravel().tolist()
+
+    def place(self, moved: List[int]) -> Iterable[int]:
+        # Applies pairs from changes
+        old = self.positions.copy()
+        for i in range(0, len(moved), 2):
+            self.positions[moved[i]] = moved[i + 1]
+        return self.moved(old)
+
+    def restore(self, positions: List[int]):
+        self.positions[:] = positions
+        self.recount()
+
+    def moved(self, old: Any) -> Iterable[int]:
+        self.recount()
+        if not self.horde.batched:
+            return {area for before, after in zip(old, self.positions) if before != after for area in (before, after)}
+        changed = old != self.positions
+        return np.union1d(old[changed], self.positions[changed]).tolist()
@@ -1,6 +1,8 @@
+from __future__ import annotations
 from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
 
-@dataclass
+@dataclass(slots=True)
 class Item:
     id: str
     name: str
@@ -9,10 +11,91 @@ class Item:
     is_light_item: bool = False
     light_count: int = 0
     is_hidden: bool = False
+    index: int = -1 # Position in the world's ItemIndex, the item's bit in every ItemSet
 
 @dataclass
 class Inventory:
     items: list[Item] = field(default_factory=list)
- 
+
     def add_item(self, item: Item):
-        self.items.append(item)
\ No newline at end of file
+        self.items.append(item)
+
+@dataclass(slots=True)
+class ItemIndex:
+    # Shared by every session: items numbered densely in the order they are first placed in an area
+    items: List[Item] = field(default_factory=list)
+    names: Dict[str, List[int]] = field(default_factory=dict) # lowercased name -> indexes of items called that
+
+    def add(self, item: Item):
+        item.index = len(self.items)
+        self.items.append(item)
+        self.names.setdefault(item.name.lower(), []).append(item.index)
+
+@dataclass(slots=True)
+class ItemSet:
+    # A set of items as a bitmask: bit i stands for item base + i
+    # Counting from the lowest item held keeps an area's few neighbouring items a small int however many items the world has
+    index: ItemIndex
+    base: int = 0
+    mask: int = 0
+
+    def copy(self) -> ItemSet:
+        return ItemSet(self.index, self.base, self.mask)
+
+    def holds(self, item: Item) -> bool:
+        return item.index >= self.base and (self.mask >> (item.index - self.base)) & 1 == 1
+
+    def add(self, item: Item):
+        if not self.mask:
+            self.base = item.index
+        elif item.index < self.base:
+            self.mask <<= self.base - item.index
+            self.base = item.index
+        self.mask |= 1 << (item.index - self.base)
+
+    def remove(self, item: Item):
+        if self.holds(item):
+            self.mask ^= 1 << (item.index - self.base)
+            if self.mask:
+                # Rebase on the lowest item left
+                low = (self.mask & -self.mask).bit_length() - 1
+                self.mask >>= low
+                self.base += low
+
+    def bits(self, base: int) -> int:
+        # This set's mask counted from base instead, dropping items below it
+        return self.mask >> (base - self.base) if base >= self.base else self.mask << (self.base - base)
+
+    def covers(self, mask: int, base: int) -> bool:
+        return mask & ~self.bits(base) == 0
+
+    def intersects(self, mask: int, base: int) -> bool:
+        return mask & self.bits(base) != 0
+
+    def values(self) -> List[Item]:
+        items, found, mask, i = self.index.items, [], self.mask, self.base
+        while mask:
+            low = mask & -mask
+            found.append(items[i + low.bit_length() - 1])
+            mask ^= low
+        return found
+
+    def keys(self) -> List[str]:
+        return [item.id for item in self.values()]
+
+    def has_by_name(self, name: str) -> bool:
+        return self.get_by_name(name) is not None
+
+    def get_by_name(self, name: str) -> Item | None:
+        items = self.index.items
+        for index in self.index.names.get(name.lower(), ()):
+            if self.holds(items[index]):
+                return items[index]
+        return None
+
+    @classmethod
+    def of(cls, index: ItemIndex, items: Iterable[Item]) -> ItemSet:
+        item_set = cls(index)
+        for item in items:
+            item_set.add(item)
+        return item_set
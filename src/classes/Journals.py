@@ -0,0 +1,238 @@
+from __future__ import annotations
+import glob
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Dict, List, Tuple, TYPE_CHECKING
+from src.classes.Items import ItemSet
+from src.singletons.Locale import locale as loc
+if TYPE_CHECKING:
+    from src.classes.Areas import TransitionRequirement
+    from src.classes.World import World
+
+SESSION_ID = re.compile(r'^\w{1,64}$')
+# Raised whenever the checkpoint's layout changes; saves of another version are refused rather than misread
+JOURNAL_VERSION = 2
+
+class JournalError(Exception):
+    # A save that cannot be resumed in this world, with a message for the player
+    pass
+
+@dataclass
+class Journal:
+    # One session saved as a checkpoint plus an append-only journal of what changed since
+    # A new checkpoint and journal generation every checkpoint_every turns keeps the replay on resume short
+    directory: str
+    session_id: str
+    checkpoint_every: int = 50
+    generation: int = 0
+    turn: int = 0
+    pending: List[List[Any]] = field(default_factory=list)
+    last_player: List[Any] | None = None
+    last_enemies: Any = None
+    deferred: bool = False # File writes wait in writes until write() runs them, so a server can run them off its event loop
+    writes: List[Tuple[Callable[..., None], Tuple[Any, ...]]] = field(default_factory=list)
+
+    @staticmethod
+    def is_valid_id(session_id: str) -> bool:
+        return SESSION_ID.match(session_id) is not None
+
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.directory, f"{self.session_id}.json")
+
+    def journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"{self.session_id}.{generation}.journal")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.checkpoint_path())
+
+    def read_checkpoint(self) -> Dict[str, Any]:
+        with open(self.checkpoint_path(), 'r') as f:
+            return json.load(f)
+
+    def language(self) -> str:
+        return self.read_checkpoint()['lang']
+
+    def start(self, world: World):
+        world.state.journal = self
+        self.checkpoint(world)
+
+    def read(self) -> Tuple[Dict[str, Any], List[str]]:
+        # The checkpoint and the lines of the journal generation it started
+        checkpoint = self.read_checkpoint()
+        try:
+            with open(self.journal_path(checkpoint.get('generation', 0)), 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            lines = []
+        return checkpoint, lines
+
+    def resume(self, world: World, saved: Tuple[Dict[str, Any], List[str]] | None = None):
+        # world is a fresh session of the template in the saved language; saved is what read returned, read here when not given
+        checkpoint, lines = saved if saved is not None else self.read()
+        if checkpoint.get('version') != JOURNAL_VERSION:
+            raise JournalError("This save was made by another version of the game and can't be resumed.")
+        # Journal entries name requirements and enemies by position, which only hold in the world they were written in
+        if checkpoint.get('world') != world.config_hash:
+            raise JournalError("This save was made for a different game world and can't be resumed.")
+        self.generation = checkpoint['generation']
+        self.turn = checkpoint['turn']
+        self.restore(world, checkpoint)
+        for line in lines:
+            if line.endswith('\n'): # A line cut short by a crash is dropped
+                self.apply(world, json.loads(line))
+        world.state.journal = self
+        self.checkpoint(world)
+
+    def record(self, entry: List[Any]):
+        self.pending.append(entry)
+
+    def end_turn(self, world: World):
+        self.turn += 1
+        player = world.player
+        now = [player.current_area.id, player.health, player.lantern_count, player.is_hiding]
+        if now != self.last_player:
+            self.pending.append(['player', *now])
+            self.last_player = now
+        enemies = world.state.enemies
+        moved = enemies.changes(self.last_enemies)
+        if moved:
+            self.pending.append(['enemies', moved])
+            self.last_enemies = enemies.positions.copy()
+
+        if self.turn % self.checkpoint_every == 0:
+            self.checkpoint(world)
+        elif self.pending:
+            # One write per turn; a turn cut short by a crash is replayed up to its last full line
+            self.queue(self.append, self.generation, "".join(json.dumps(entry) + "\n" for entry in self.pending))
+            self.pending.clear()
+
+    def queue(self, write: Callable[..., None], *args: Any):
+        self.writes.append((write, args))
+        if not self.deferred:
+            self.write()
+
+    def write(self):
+        # Runs the queued writes in order
+        writes, self.writes = self.writes, []
+        for write, args in writes:
+            write(*args)
+
+    def append(self, generation: int, text: str):
+        with open(self.journal_path(generation), 'a') as f:
+            f.write(text)
+
+    def checkpoint(self, world: World):
+        state, player = world.state, world.player
+        requirements = self.requirements(world)
+        self.generation += 1
+        data = {
+            'version': JOURNAL_VERSION,
+            'world': world.config_hash,
+            'lang': loc.current_lang,
+            'generation': self.generation,
+            'turn': self.turn,
+            'items': {area_id: items.keys() for area_id, items in state.area_items.items()},
+            'inventory': player.inventory.keys(),
+            'requirements': {key: [item.id for item in requirement.missing()] for key, requirement in requirements.items() if requirement.id in state.requirements},
+            'events': sorted(state.fired_events),
+            'player': [player.current_area.id, player.health, player.lantern_count, player.is_hiding],
+            'enemies': {enemy.name: world.data_horde.areas[position].id for enemy, position in zip(world.data_horde.enemies, state.enemies.positions)},
+        }
+        self.queue(self.save, data)
+        self.pending.clear()
+        self.last_player = data['player']
+        self.last_enemies = state.enemies.positions.copy()
+
+    def save(self, data: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.checkpoint_path()
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+        # Journals of earlier generations are covered by the checkpoint now
+        for stale in glob.glob(os.path.join(self.directory, f"{self.session_id}.*.journal")):
+            if stale != self.journal_path(data['generation']):
+                os.remove(stale)
+
+    def discard(self):
+        self.queue(self.remove)
+
+    def remove(self):
+        # The checkpoint, its journals and any checkpoint a crash left half written
+        for path in glob.glob(os.path.join(self.directory, f"{self.session_id}.*")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def restore(self, world: World, checkpoint: Dict[str, Any]):
+        state, player = world.state, world.player
+        for area_id, item_ids in checkpoint['items'].items():
+            state.area_items[area_id] = self.item_store(world, item_ids)
+        player.inventory = self.item_store(world, checkpoint['inventory'])
+        requirements = self.requirements(world)
+        for key, item_ids in checkpoint['requirements'].items():
+            requirement = requirements.get(key)
+            # Each entry lists the items a requirement still misses; anything else, like the {item id: used} of older saves, is refused
+            if requirement is None or not isinstance(item_ids, list) or not all(isinstance(item_id, str) and world.data_items.has(item_id) for item_id in item_ids):
+                raise JournalError("This save is damaged and can't be resumed.")
+            state.requirements[requirement.id] = self.item_store(world, item_ids).bits(requirement.need.base)
+            if requirement.is_met:
+                state.open_requirement(requirement.id)
+        state.fired_events.update(checkpoint['events'])
+        self.apply(world, ['player', *checkpoint['player']])
+        state.enemies.restore([world.data_areas.get(checkpoint['enemies'][enemy.name]).index for enemy in world.data_horde.enemies])
+        state.descriptions.clear()
+
+    def apply(self, world: World, entry: List[Any]):
+        state, player, items = world.state, world.player, world.data_items
+        match entry:
+            case ['take', area_id, item_id]:
+                world.data_areas.get(area_id).edit_items().remove(items.get(item_id))
+                player.inventory.add(items.get(item_id))
+            case ['drop', area_id, item_id]:
+                player.inventory.remove(items.get(item_id))
+                world.data_areas.get(area_id).edit_items().add(items.get(item_id))
+            case ['give', item_id]:
+                player.inventory.add(items.get(item_id))
+            case ['place', area_id, item_id]:
+                world.data_areas.get(area_id).edit_items().add(items.get(item_id))
+            case ['condition', requirement_id, item_id]:
+                self.requirement(world, requirement_id).check(items.get(item_id))
+            case ['fulfil', requirement_id]:
+                self.requirement(world, requirement_id).force_fulfill()
+            case ['event', event_id]:
+                state.fired_events.add(event_id)
+            case ['player', area_id, health, lantern_count, is_hiding]:
+                player.restore(world.data_areas.get(area_id), health, lantern_count, is_hiding)
+            case ['enemies', moved]:
+                state.invalidate(state.enemies.place(moved))
+
+    def item_store(self, world: World, item_ids: List[str]) -> ItemSet:
+        return ItemSet.of(world.data_item_index, [world.data_items.get(item_id) for item_id in item_ids])
+
+    def requirements(self, world: World) -> Dict[str, TransitionRequirement]:
+        # Keyed by config ids, the area an exit is declared in and its direction there, so a checkpoint does not depend on link order
+        return {f"{exit.areas[0].id} {exit.direction}": exit.transitionRequirement for exit in world.data_graph.exits}
+
+    def requirement(self, world: World, requirement_id: int) -> TransitionRequirement:
+        return next(requirement for requirement in self.requirements(world).values() if requirement.id == requirement_id)
+
+def prune_saves(directory: str, max_age: float, max_count: int, keep: Collection[str] = ()):
+    # Removes saves untouched for max_age seconds, then the least recently touched beyond max_count; saves in keep stay
+    touched: Dict[str, float] = {}
+    for path in glob.glob(os.path.join(directory, '*')):
+        session_id = os.path.basename(path).split('.')[0]
+        try:
+            touched[session_id] = max(touched.get(session_id, 0.0), os.path.getmtime(path))
+        except FileNotFoundError:
+            pass
+    now = time.time()
+    newest = sorted(((touched_at, session_id) for session_id, touched_at in touched.items() if session_id not in keep), reverse=True)
+    for rank, (touched_at, session_id) in enumerate(newest):
+        if rank >= max_count or now - touched_at > max_age:
+            Journal(directory, session_id).remove()
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+from src.types.ConfigTypes import GameConfig
+from src.classes.Areas import Area, Exit, Group, TransitionRequirement
+from src.classes.Characters import Enemy, NPC, Player
+from src.classes.Events import AFFECTS, CONDITIONS, Event, ThrowEvent, EnterEvent, TakeEvent, ExamineEvent, UseEvent, compile_affect, compile_condition
+from src.classes.Items import Item, ItemSet
+from src.classes.World import World
+from src.singletons.Locale import locale as loc
+
+# Event trigger type -> command group it fires on, event class and the kind of id its data names
+EVENT_TRIGGERS: Dict[str, Tuple[str, type[Event], str]] = {
+    'enter': ('go', EnterEvent, 'area'),
+    'take': ('take', TakeEvent, 'item'),
+    'examine': ('examine', ExamineEvent, 'item'),
+    'use': ('use', UseEvent, 'item'),
+    'throw': ('throw', ThrowEvent, 'item'),
+}
+CONDITION_REFERENCES = {'area': 'area', 'inventory_has': 'item'}
+AFFECT_REFERENCES = {'add_item_to_inventory': 'item', 'take_item': 'item', 'add_item_to_current_area': 'item'}
+
+class LinkError(Exception):
+    def __init__(self, errors: List[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+@dataclass
+class WorldLinker:
+    # Links a parsed config into a World in passes that each read the config once: index numbers every entry,
+    # resolve turns references into those numbers and collects errors, attach builds and joins the objects
+    config: GameConfig
+    ids: Dict[str, Dict[str, int]] = field(default_factory=dict) # kind -> config id -> integer id
+    errors: List[str] = field(default_factory=list)
+    area_groups: List[List[int]] = field(default_factory=list)
+    area_items: List[List[int]] = field(default_factory=list)
+    area_exits: List[List[Tuple[str, int, int]]] = field(default_factory=list) # direction, area, requirement or -1
+    requirement_items: List[List[int]] = field(default_factory=list)
+    start_area: int = -1
+    npc_areas: List[int] = field(default_factory=list)
+    enemy_groups: List[int] = field(default_factory=list)
+    event_targets: List[int] = field(default_factory=list)
+    event_conditions: List[List[int]] = field(default_factory=list) # id each condition's data names, -1 when it names none
+    event_affects: List[List[int]] = field(default_factory=list)
+
+    def link(self) -> World:
+        self.index()
+        self.resolve()
+        if self.errors:
+            raise LinkError(self.errors)
+        return self.attach()
+
+    def index(self):
+        for kind, section in (('item', 'items'), ('group', 'groups'), ('area', 'areas'), ('requirement', 'transitionRequirements')):
+            ids = self.ids[kind] = {}
+            for entry in self.config[section]:
+                # Interned once here; every reference resolves to this string
+                entry['id'] = sys.intern(entry['id'])
+                ids[entry['id']] = len(ids)
+
+    def ref(self, kind: str, value: str, owner: str, owner_id: str) -> int:
+        found = self.ids[kind].get(value)
+        if found is None:
+            self.errors.append(f"{owner} '{owner_id}' refers to unknown {kind} '{value}'")
+            return -1
+        return found
+
+    def resolve(self):
+        config = self.config
+        for area in config['areas']:
+            where = ('area', area['id'])
+            self.area_groups.append([self.ref('group', group_id, *where) for group_id in area['r_groups']])
+            self.area_items.append([self.ref('item', item_id, *where) for item_id in area.get('items', [])])
+            self.area_exits.append([
+                (
+                    sys.intern(exit['c_direction']),
+                    self.ref('area', exit['r_pointer'], *where),
+                    self.ref('requirement', exit['requirement']['r_transitionRequirement'], *where) if 'requirement' in exit else -1,
+                )
+                for exit in area.get('exits', [])
+            ])
+        for requirement in config['transitionRequirements']:
+            where = ('transition requirement', requirement['id'])
+            self.requirement_items.append([self.ref('item', item_id, *where) for item_id in requirement['fulfillCondition']['r_items']])
+        self.start_area = self.ref('area', config['general']['player']['startingState']['r_area'], "player", "startingState")
+        self.npc_areas = [self.ref('area', npc['r_area'], "npc", npc['id']) for npc in config['npcs']]
+        self.enemy_groups = [self.ref('group', enemy['r_roaming_group'], "enemy", enemy['id']) for enemy in config['enemies']]
+        for event in config['events']:
+            where = ('event', event['id'])
+            trigger = EVENT_TRIGGERS.get(event['trigger']['type'])
+            if trigger is None:
+                self.errors.append(f"event '{event['id']}' has unknown trigger type '{event['trigger']['type']}'")
+            self.event_targets.append(-1 if trigger is None else self.ref(trigger[2], event['trigger']['data'], *where))
+            self.event_conditions.append([self.typed('condition', CONDITIONS, CONDITION_REFERENCES, condition, where) for condition in event.get('additional_conditions', [])])
+            self.event_affects.append([self.typed('affect', AFFECTS, AFFECT_REFERENCES, affect, where) for affect in event.get('affects', [])])
+
+    def typed(self, what: str, known: Dict[str, Any], references: Dict[str, str], entry: Dict[str, Any], where: Tuple[str, str]) -> int:
+        # Checks a condition or affect type and resolves the id its data names, if its type names one
+        if entry['type'] not in known:
+            self.errors.append(f"{where[0]} '{where[1]}' has unknown {what} type '{entry['type']}'")
+            return -1
+        if entry['type'] in references:
+            return self.ref(references[entry['type']], entry['data'], *where)
+        return -1
+
+    def attach(self) -> World:
+        config = self.config
+        world = World()
+
+        items: List[Item] = []
+        for item in config['items']:
+            item_obj = Item(
+                id=item['id'],
+                name=loc.t(item['t_name']),
+                description=loc.t(item['t_description']),
+                isInventoryItem=item['isInventoryItem'],
+                is_light_item=item['isLightItem'],
+            )
+            if 'lightCount' in item:
+                item_obj.light_count = item['lightCount']
+            if 'isHidden' in item:
+                item_obj.is_hidden = item['isHidden']
+            items.append(item_obj)
+            world.data_items.add(item['id'], item_obj)
+        # Numbered in the order areas list them, so an area's items are neighbouring bits; then the rest
+        item_index = world.data_item_index
+        for item_ids in self.area_items:
+            for item_id in item_ids:
+                if items[item_id].index < 0:
+                    item_index.add(items[item_id])
+        for item_obj in items:
+            if item_obj.index < 0:
+                item_index.add(item_obj)
+
+        groups: List[Group] = []
+        for group in config['groups']:
+            groups.append(Group(
+                id=group['id'],
+                name=loc.t(group['t_name']),
+                enter_description=loc.t(group['t_enterDescription']),
+                exit_description=loc.t(group['t_exitDescription']),
+            ))
+            world.data_groups.add(group['id'], groups[-1])
+
+        areas: List[Area] = []
+        for area, group_ids, item_ids in zip(config['areas'], self.area_groups, self.area_items):
+            area_obj = Area(
+                id=area['id'],
+                name=loc.t(area['t_name']),
+                enter_description=loc.t(area['t_enterDescription']),
+                require_light=area['requireLight'],
+                is_hidable=area['isHidable'],
+                default_items=ItemSet.of(item_index, [items[item_id] for item_id in item_ids]),
+            )
+            for group_id in group_ids:
+                groups[group_id].areas.add(area_obj.id, area_obj)
+                area_obj.groups.append(groups[group_id])
+            areas.append(area_obj)
+            world.data_areas.add(area['id'], area_obj)
+
+        # Both sides of an exit list it; the first side creates it and the second, found by area pair, shares it
+        # A requirement may be declared on either side
+        n = len(areas)
+        pending: Dict[int, Exit] = {}
+        exit_count = 0
+        for area_id, exits in enumerate(self.area_exits):
+            area = areas[area_id]
+            for direction, target, requirement in exits:
+                exit = pending.pop(area_id * n + target, None)
+                if exit is None:
+                    exit = Exit(
+                        direction=direction,
+                        area=areas[target],
+                        areas=(area, areas[target]),
+                        transitionRequirement=TransitionRequirement(exit_count, ItemSet(item_index)),
+                    )
+                    exit_count += 1
+                    pending[target * n + area_id] = exit
+                if requirement >= 0:
+                    self.require(exit.transitionRequirement, requirement, items)
+                area.exits.add(direction, exit)
+        world.build_graph()
+
+        for cmd_group in loc.t('commands'):
+            for cmd in loc.t(f"commands.{cmd_group}"):
+                world.add_command(cmd, cmd_group)
+
+        player = config['general']['player']
+        world.append_character(Player(
+            name="Evelyn",
+            current_area=areas[self.start_area],
+            hiding_safety=player['hidingSafety'],
+            inventory=ItemSet(item_index),
+        ))
+        for npc, area_id in zip(config['npcs'], self.npc_areas):
+            world.append_character(NPC(
+                name=loc.t(npc['t_name']),
+                dialog=loc.t(npc['t_dialog']),
+                current_area=areas[area_id],
+            ))
+        npc_area_ids = {areas[area_id].id for area_id in self.npc_areas}
+        for enemy, group_id in zip(config['enemies'], self.enemy_groups):
+            # Linking stays deterministic so it can be cached; each session draws where its enemies spawn, see Horde.spawn
+            first_area = next((area for area in groups[group_id].areas.values() if area.id not in npc_area_ids), None)
+            if first_area:
+                world.append_character(Enemy(
+                    name=enemy['id'],
+                    current_area=first_area,
+                    damage=enemy['damage'],
+                    damage_with_light=enemy['damageWithLight'],
+                    roaming_group=groups[group_id],
+                ))
+        world.build_horde()
+        world.chase = config['general']['enemy'].get('chase', False)
+        world.index_names()
+
+        objects: Dict[str, List[Any]] = {'area': areas, 'item': items}
+        for event, target, condition_ids, affect_ids in zip(config['events'], self.event_targets, self.event_conditions, self.event_affects):
+            command_group, event_class, kind = EVENT_TRIGGERS[event['trigger']['type']]
+            world.data_triggers.add(command_group, event_class(
+                id=event['id'],
+                trigger_data=objects[kind][target],
+                additional_conditions=[
+                    compile_condition(condition['type'], objects[CONDITION_REFERENCES[condition['type']]][ref] if ref >= 0 else condition['data'])
+                    for condition, ref in zip(event.get('additional_conditions', []), condition_ids)
+                ],
+                affects=[
+                    compile_affect(affect['type'], items[ref] if ref >= 0 else loc.t(affect['data']) if affect['type'] == 'dialog' else affect['data'])
+                    for affect, ref in zip(event.get('affects', []), affect_ids)
+                ],
+                once=event['once'],
+            ))
+        return world
+
+    def require(self, transition: TransitionRequirement, requirement: int, items: List[Item]):
+        config = self.config['transitionRequirements'][requirement]
+        if not transition.need.mask:
+            transition.unfufilled_description = loc.t(config['t_unfulfilled_description'])
+            transition.fulfilled_description = loc.t(config['t_fulfilled_description'])
+            transition.is_hidden_when_unfulfilled = config.get('isHiddenWhenUnfulfilled', False)
+        for item_id in self.requirement_items[requirement]:
+            transition.add_condition(items[item_id])
@@ -1,7 +1,14 @@
+from contextvars import ContextVar
 from typing import Any
+from string import Formatter
 import json
 
 
+class Template(str):
+    # A locale string with format fields, already converted from %{name} to {name}
+    pass
+
+
 class Locale:
 
     supported_locales = [
@@ -10,36 +17,70 @@ class Locale:
 
     def __init__(self, locale_file: str | dict[str, str]):
         self.default_locale: str = 'en'
-        self.current_lang: str = 'en'
-        self.data_locale: dict[str, Any] = {}
+        self.locale_files: dict[str, str] = {}
+        self.catalogs: dict[str, dict[str, Any]] = {}
         if isinstance(locale_file, dict):
             if self.default_locale not in locale_file:
                 self.default_locale = list(locale_file.keys())[0]
-                self.current_lang = self.default_locale
-            for key, value in locale_file.items():
-                with open(value, 'r') as f:
-                    self.data_locale[key] = json.load(f)
+            self.locale_files.update(locale_file)
         else:
-            with open(locale_file, 'r') as f:
-                self.data_locale[self.default_locale] = json.load(f)
+            self.locale_files[self.default_locale] = locale_file
+        # The selected language is per context so concurrent sessions can play in different languages.
+        # Language files are only read once a language is first used.
+        self.__active = ContextVar[tuple[str, dict[str, Any]] | None](f"locale_{id(self)}", default=None)
+
+    @property
+    def current_lang(self) -> str:
+        active = self.__active.get()
+        return self.default_locale if active is None else active[0]
 
-    def __get_value(self, key: str, default):
-        keys = key.split('.')
-        value = self.data_locale[self.current_lang]
-        for k in keys:
-            value = value.get(k, default)
-        return value
+    def __flatten(self, prefix: str, node: dict[str, Any], table: dict[str, Any]):
+        for key, value in node.items():
+            path = f"{prefix}.{key}" if prefix else key
+            if isinstance(value, dict):
+                self.__flatten(path, value, table)
+            elif isinstance(value, str):
+                template = value.replace("%{", "{")
+                if any(field is not None for _, field, _, _ in Formatter().parse(template)):
+                    value = Template(template)
+                else:
+                    value = template.format()
+            table[path] = value
+
+    def catalog(self, lang: str) -> dict[str, Any]:
+        # Languages override the default's table, so missing keys resolve to the default
+        if lang not in self.catalogs:
+            table: dict[str, Any] = {}
+            if lang != self.default_locale:
+                table.update(self.catalog(self.default_locale))
+            with open(self.locale_files[lang], 'r') as f:
+                self.__flatten("", json.load(f), table)
+            self.catalogs[lang] = table
+        return self.catalogs[lang]
+
+    def use_files(self, locale_files: dict[str, str]):
+        # Switches to another set of language files, such as a generated world's
+        self.locale_files = dict(locale_files)
+        if self.default_locale not in self.locale_files:
+            self.default_locale = list(self.locale_files.keys())[0]
+        self.catalogs.clear()
+        self.__active.set(None)
 
     def set_locale(self, lang: str):
-        if lang in self.supported_locales:
-            self.current_lang = lang
-        else:
-            self.current_lang = self.default_locale
+        if lang not in self.supported_locales or lang not in self.locale_files:
+            lang = self.default_locale
+        self.__active.set((lang, self.catalog(lang)))
 
     def t(self, key: str, **kwargs):
-        translation = self.__get_value(key, {})
-        if isinstance(translation, str):
-            return translation.replace("%{", "{").format(**kwargs)
+        active = self.__active.get()
+        if active is None:
+            self.set_locale(self.default_locale)
+            active = self.__active.get()
+        translation = active[1].get(key)
+        if translation is None:
+            return {}
+        if translation.__class__ is Template:
+            return translation.format(**kwargs)
         return translation
 
     def conjunction_list(self, items) -> str:
@@ -0,0 +1,253 @@
+from __future__ import annotations
+import bisect
+import itertools
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, Iterable, List, Set, Tuple, TypeVar
+from src.singletons.Locale import locale as loc
+
+T = TypeVar('T')
+
+@dataclass
+class TrieNode(Generic[T]):
+    children: Dict[str, TrieNode[T]] = field(default_factory=dict)
+    value: T | None = None
+
+@dataclass
+class TokenTrie(Generic[T]):
+    root: TrieNode[T] = field(default_factory=TrieNode)
+
+    def add(self, phrase: str, value: T):
+        node = self.root
+        for token in phrase.lower().split():
+            node = node.children.setdefault(token, TrieNode())
+        node.value = value
+
+    def matches(self, tokens: List[str], start: int = 0) -> List[Tuple[int, T]]:
+        # Every phrase that prefixes tokens[start:], shortest first, as (end index, value)
+        found: List[Tuple[int, T]] = []
+        node = self.root
+        for i in range(start, len(tokens)):
+            next_node = node.children.get(tokens[i])
+            if next_node is None:
+                break
+            node = next_node
+            if node.value is not None:
+                found.append((i + 1, node.value))
+        return found
+
+@dataclass
+class CommandParser:
+    commands: TokenTrie[str] = field(default_factory=TokenTrie[str])
+    names: TokenTrie[str] = field(default_factory=TokenTrie[str])
+
+    def add_command(self, cmd: str, cmd_group: str):
+        self.commands.add(cmd, cmd_group)
+
+    def add_name(self, name: str):
+        self.names.add(name, " ".join(name.lower().split()))
+
+    def parse(self, action: str, is_present: Callable[[str], bool] = lambda name: False) -> Tuple[str, str, str] | None:
+        tokens = action.lower().split()
+        found = self.commands.matches(tokens)
+        if not found:
+            return None
+        end, cmd_group = found[-1]
+        return cmd_group, " ".join(tokens[:end]), self.resolve_target(tokens[end:], is_present)
+
+    def resolve_target(self, tokens: List[str], is_present: Callable[[str], bool]) -> str:
+        # Prefer the longest known name present in the current area, then the longest known name
+        found = self.names.matches(tokens)
+        for _, name in reversed(found):
+            if is_present(name):
+                return name
+        if found:
+            return found[-1][1]
+        return " ".join(tokens)
+
+# Typed text shorter than PREFIX_MIN only matches whole words. A word is forgiven no typo below TYPO_LENGTHS[0]
+# characters, one below TYPO_LENGTHS[1] and two from there, numbers none; a typed and a known word get the lesser of theirs
+PREFIX_MIN = 3
+TYPO_LENGTHS = (4, 8)
+MAX_READINGS = 16
+
+def typo_bound(word: str) -> int:
+    return 0 if word.isdigit() else sum(len(word) >= length for length in TYPO_LENGTHS)
+
+def edit_distance(a: str, b: str, bound: int) -> int:
+    # Letters added, left out, changed or swapped with the next one to turn a into b, or bound + 1 as soon as it is sure to exceed bound
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, a_char in enumerate(a, 1):
+        current = [i]
+        for j, b_char in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a_char != b_char))
+            if before is not None and j > 1 and a_char == b[j - 2] and a[i - 2] == b_char:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > bound and (before is None or min(previous) > bound):
+            return bound + 1
+        before, previous = previous, current
+    return min(previous[-1], bound + 1)
+
+def deletions(word: str, depth: int) -> Set[str]:
+    # word with up to depth characters left out; two words within depth edits of each other share one of these
+    found, level = {word}, {word}
+    for _ in range(depth):
+        level = {variant[:i] + variant[i + 1:] for variant in level for i in range(len(variant))}
+        found |= level
+    return found
+
+def name_forms(text: str) -> List[str]:
+    # What the player may have meant by text: text itself, then without leading articles, then what the locale aliases those to
+    # Nothing at all when text is blank, so a bare command names nothing
+    words = text.lower().split()
+    if not words:
+        return []
+    forms = [" ".join(words)]
+    articles = loc.t("names.articles") or ()
+    while len(words) > 1 and words[0] in articles:
+        words = words[1:]
+        forms.append(" ".join(words))
+    for form in list(forms):
+        alias = loc.t(f"names.aliases.{form}")
+        if isinstance(alias, str):
+            forms.append(alias.lower())
+    return forms
+
+def name_rank(form: str, name: str) -> int | None:
+    # 0 for the name itself, else 1 + typos when form's words are the name's from one of them on, the last perhaps
+    # only started; None when they are not
+    if form == name:
+        return 0
+    typed, words = form.split(), name.split()
+    best = None
+    for start in range(len(words) - len(typed) + 1):
+        typos = 0
+        for i, word in enumerate(typed):
+            known = words[start + i]
+            if word == known or (i == len(typed) - 1 and len(form) >= PREFIX_MIN and known.startswith(word)):
+                continue
+            bound = min(typo_bound(word), typo_bound(known))
+            distance = edit_distance(word, known, bound)
+            if distance > bound:
+                break
+            typos += distance
+        else:
+            if best is None or typos < best:
+                best = typos
+    return None if best is None else 1 + best
+
+def match_name(text: str, names: Iterable[str]) -> str | None:
+    # The name text best stands for among a few, such as the items at hand, ties going to the shortest
+    forms = name_forms(text)
+    if not forms:
+        return None
+    best = None
+    for name in names:
+        lowered = name.lower()
+        for form in forms:
+            rank = name_rank(form, lowered)
+            if rank is not None and (best is None or (rank, len(name), lowered) < best[:3]):
+                best = (rank, len(name), lowered, name)
+    return None if best is None else best[3]
+
+@dataclass(slots=True)
+class NameResolver:
+    # Fuzzy lookup over every name of a NamableDataStore, kept up to date by subscribing to the store's changes
+    # Typos are mended a word at a time against the words the names are made of, through an index of each word with
+    # letters left out, so a lookup costs about the same however many names there are
+    names: Dict[str, str] # the store's name_to_id; a name counts while it is in there
+    starts: List[Tuple[str, str]] = field(default_factory=list) # (name from one of its words on, name), sorted
+    words: Dict[str, int] = field(default_factory=dict) # word -> names using it
+    variants: Dict[str, Set[str]] = field(default_factory=dict) # word with letters left out -> words, never emptied
+
+    def changed(self, version: int, change: str, key: str, value: object):
+        name = getattr(value, 'name', None)
+        if isinstance(name, str) and name:
+            if change == 'add':
+                self.add(name.lower())
+            elif name.lower() not in self.names:
+                self.discard(name.lower())
+
+    @classmethod
+    def of(cls, names: Dict[str, str]) -> NameResolver:
+        # Sorting once instead of inserting each name keeps building over many names fast
+        resolver = cls(names)
+        for name in names:
+            words = name.split()
+            resolver.starts.extend((" ".join(words[i:]), name) for i in range(len(words)))
+            resolver.count(words)
+        resolver.starts.sort()
+        return resolver
+
+    def count(self, words: List[str]):
+        for word in words:
+            self.words[word] = self.words.get(word, 0) + 1
+            if self.words[word] == 1:
+                for variant in deletions(word, typo_bound(word)):
+                    self.variants.setdefault(variant, set()).add(word)
+
+    def add(self, name: str):
+        words = name.split()
+        position = bisect.bisect_left(self.starts, (name, name))
+        if position < len(self.starts) and self.starts[position] == (name, name):
+            return
+        for i in range(len(words)):
+            bisect.insort(self.starts, (" ".join(words[i:]), name))
+        self.count(words)
+
+    def discard(self, name: str):
+        words = name.split()
+        position = bisect.bisect_left(self.starts, (name, name))
+        if position == len(self.starts) or self.starts[position] != (name, name):
+            return
+        for i, word in enumerate(words):
+            position = bisect.bisect_left(self.starts, (" ".join(words[i:]), name))
+            del self.starts[position]
+            self.words[word] -= 1
+
+    def mend(self, word: str) -> List[Tuple[int, str]]:
+        # Known words within the typos word is forgiven, as (typos, word), fewest first
+        bound = typo_bound(word)
+        if not bound:
+            return []
+        close = set()
+        for variant in deletions(word, bound):
+            close.update(self.variants.get(variant, ()))
+        mended = []
+        for known in close:
+            limit = min(bound, typo_bound(known))
+            distance = edit_distance(word, known, limit)
+            if distance <= limit and self.words[known]:
+                mended.append((distance, known))
+        return sorted(mended)
+
+    def readings(self, form: str) -> List[Tuple[int, str]]:
+        # form, then form with its unknown words mended, as (typos, text), fewest typos first
+        choices = []
+        for word in form.split():
+            choices.append([(0, word)] + (self.mend(word) if not self.words.get(word) else []))
+        readings = [(sum(typos for typos, _ in reading), " ".join(word for _, word in reading)) for reading in itertools.islice(itertools.product(*choices), MAX_READINGS * 4)]
+        return sorted(readings)[:MAX_READINGS]
+
+    def resolve(self, text: str, limit: int = 8) -> List[str]:
+        # Up to limit names text may stand for, ranked as name_rank does, ties going to the shortest
+        forms = name_forms(text)
+        for form in forms:
+            if form in self.names:
+                return [form]
+        found: Dict[str, int] = {}
+        for form in forms:
+            prefix = len(form) >= PREFIX_MIN
+            for typos, reading in self.readings(form):
+                position, count = bisect.bisect_left(self.starts, (reading,)), 0
+                while position < len(self.starts) and count < limit:
+                    start, name = self.starts[position]
+                    if not start.startswith(reading):
+                        break
+                    if (prefix or start == reading or start.startswith(reading + " ")) and name in self.names and 1 + typos < found.get(name, 1 << 30):
+                        found[name] = 1 + typos
+                        count += 1
+                    position += 1
+        return sorted(found, key=lambda name: (found[name], len(name), name))[:limit]
@@ -0,0 +1,190 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Set, Tuple
+from src.classes.Graphs import AreaGraph
+
+# Up to this many areas every row is built up front and kept exact by relax when a requirement opens.
+# Above it a full table no longer fits (n^2 entries), so rows are searched when first asked for and
+# the oldest dropped once a table's rows and toward lists hold ROW_BUDGET entries together.
+DENSE_LIMIT = 512
+ROW_BUDGET = 1 << 22
+
+Row = Tuple[List[int], List[int]] # distances (hops, or n when unreachable) and first edge to take (or -1) to every area
+
+@dataclass(slots=True)
+class RouteTable:
+    # Shortest paths from an area to every other with the requirements in opened fulfilled
+    index: RouteIndex
+    opened: FrozenSet[int]
+    closed: Set[int] # edges still locked
+    rows: Dict[int, Row] = field(default_factory=dict) # source area index -> row
+    towards: Dict[int, List[int]] = field(default_factory=dict) # area index -> next area from every area
+
+    def row(self, source: int) -> Row:
+        row = self.rows.get(source)
+        if row is None:
+            self.make_room()
+            row = self.rows[source] = self.search(source)
+        return row
+
+    def make_room(self):
+        # Drops the oldest toward lists, then the oldest rows, until one more entry of n fits in ROW_BUDGET
+        # Dense tables never drop a row: n rows and n toward lists of n stay well under it
+        n = len(self.index.graph.areas)
+        while (len(self.rows) + len(self.towards) + 1) * n > ROW_BUDGET and (self.rows or self.towards):
+            entries = self.towards if self.towards else self.rows
+            del entries[next(iter(entries))]
+
+    def distance(self, source: int, target: int) -> int | None:
+        distance = self.row(source)[0][target]
+        return distance if distance < len(self.index.graph.areas) else None
+
+    def next_edge(self, source: int, target: int) -> int:
+        return self.row(source)[1][target]
+
+    def path(self, source: int, target: int) -> Tuple[int, int] | None:
+        # Distance and first edge from source to target, searching only as far as target when source has no row yet
+        row = self.rows.get(source)
+        if row is not None:
+            distance = row[0][target]
+            return (distance, row[1][target]) if distance < len(self.index.graph.areas) else None
+        found = self.nearest(source, target.__eq__)
+        return None if found is None else (found[0], found[2])
+
+    def toward(self, target: int) -> List[int]:
+        # The area one step closer to target from every area, or -1; exits lead both ways so target's own row is enough
+        if target not in self.towards:
+            graph = self.index.graph
+            distances = self.row(target)[0]
+            toward = [-1] * len(graph.areas)
+            for area, distance in enumerate(distances):
+                if 0 < distance < len(graph.areas):
+                    for edge in range(graph.offsets[area], graph.offsets[area + 1]):
+                        if distances[graph.targets[edge]] == distance - 1 and edge not in self.closed:
+                            toward[area] = graph.targets[edge]
+                            break
+            self.make_room()
+            self.towards[target] = toward
+            return toward
+        return self.towards[target]
+
+    def search(self, source: int) -> Row:
+        # Breadth first over the edges that are not closed
+        graph = self.index.graph
+        n = len(graph.areas)
+        distances, next_edges = [n] * n, [-1] * n
+        distances[source] = 0
+        queue = deque([source])
+        while queue:
+            area = queue.popleft()
+            for edge in range(graph.offsets[area], graph.offsets[area + 1]):
+                target = graph.targets[edge]
+                if distances[target] < n or edge in self.closed:
+                    continue
+                distances[target] = distances[area] + 1
+                next_edges[target] = edge if area == source else next_edges[area]
+                queue.append(target)
+        return distances, next_edges
+
+    def nearest(self, source: int, match: Callable[[int], bool]) -> Tuple[int, int, int] | None:
+        # Distance, area index and first edge of the closest area match accepts, the lowest index among equally close ones
+        # Searches outward from source and stops at the first distance with a match, so nothing past it is visited
+        graph = self.index.graph
+        if match(source):
+            return 0, source, -1
+        first_edges = {source: -1}
+        level, distance = [source], 0
+        while level:
+            distance += 1
+            next_level = []
+            for area in level:
+                for edge in range(graph.offsets[area], graph.offsets[area + 1]):
+                    target = graph.targets[edge]
+                    if target not in first_edges and edge not in self.closed:
+                        first_edges[target] = edge if area == source else first_edges[area]
+                        next_level.append(target)
+            found = [target for target in next_level if match(target)]
+            if found:
+                target = min(found)
+                return distance, target, first_edges[target]
+            level = next_level
+        return None
+
+    def open(self, requirement_id: int) -> RouteTable:
+        index = self.index
+        if requirement_id not in index.locks or requirement_id in self.opened:
+            return self
+        opened = self.opened | {requirement_id}
+        table = index.tables.get(opened)
+        if table is None:
+            table = RouteTable(index, opened, self.closed.difference(index.locks[requirement_id]))
+            if index.dense:
+                table.rows = {source: (list(distances), list(next_edges)) for source, (distances, next_edges) in self.rows.items()}
+                for edge in index.locks[requirement_id]:
+                    table.relax(edge)
+        index.keep(table)
+        return table
+
+    def relax(self, edge: int):
+        # Adding one edge u -> v can only shorten paths i -> u -> v -> j, so one O(n^2) pass keeps the table exact
+        graph = self.index.graph
+        n = len(graph.areas)
+        source, target = self.index.sources[edge], graph.targets[edge]
+        target_row = list(self.rows[target][0])
+        for i, (distances, next_edges) in self.rows.items():
+            via = distances[source] + 1
+            if via > n:
+                continue
+            hop = edge if i == source else next_edges[source]
+            for j in range(n):
+                if via + target_row[j] < distances[j]:
+                    distances[j] = via + target_row[j]
+                    next_edges[j] = hop
+
+@dataclass(slots=True)
+class RouteIndex:
+    # Shared by every session; tables are built once per set of fulfilled requirements and reused
+    graph: AreaGraph = field(default_factory=AreaGraph)
+    sources: List[int] = field(default_factory=list) # edge -> area index it leaves
+    locks: Dict[int, List[int]] = field(default_factory=dict) # requirement id -> edges closed until it is fulfilled
+    unlocks: Dict[str, List[int]] = field(default_factory=dict) # item id -> area indexes with a locked exit it helps open
+    tables: Dict[FrozenSet[int], RouteTable] = field(default_factory=dict) # least recently used first
+    dense: bool = True
+    table_limit: int = 4 # tables kept at once; dense ones are sized to hold about ROW_BUDGET entries together
+
+    @classmethod
+    def from_graph(cls, graph: AreaGraph) -> RouteIndex:
+        # A dense table holds n rows of n; a sparse one fills up to ROW_BUDGET, so only a few of those are kept
+        n = max(len(graph.areas), 1)
+        dense = n <= DENSE_LIMIT
+        index = cls(graph, dense=dense, table_limit=max(ROW_BUDGET // (n * n), 4) if dense else 4)
+        for area in graph.areas:
+            for edge in graph.edges(area):
+                index.sources.append(area.index)
+                requirement = graph.exits[edge].transitionRequirement
+                if requirement.need.mask:
+                    index.locks.setdefault(requirement.id, []).append(edge)
+                    for item in requirement.need.values():
+                        index.unlocks.setdefault(item.id, []).append(area.index)
+        table = RouteTable(index, frozenset(), {edge for edges in index.locks.values() for edge in edges})
+        if index.dense:
+            for source in range(len(graph.areas)):
+                table.row(source)
+        index.tables[frozenset()] = table
+        return index
+
+    def keep(self, table: RouteTable):
+        # Marks table as the most recently used and drops the least recently used past table_limit
+        # The initial table stays, every session starts from it; sessions hold on to their own table either way
+        self.tables.pop(table.opened, None)
+        self.tables[table.opened] = table
+        while len(self.tables) > self.table_limit:
+            del self.tables[next(opened for opened in self.tables if opened)]
+
+    def gated_areas(self, requirement_id: int) -> List[int]:
+        return [self.sources[edge] for edge in self.locks.get(requirement_id, ())]
+
+    @property
+    def initial(self) -> RouteTable:
+        return self.tables[frozenset()]
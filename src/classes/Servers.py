@@ -0,0 +1,151 @@
+from __future__ import annotations
+import asyncio
+import io
+import re
+import secrets
+from dataclasses import dataclass, field
+from typing import Callable, List
+from src.classes.Journals import Journal, JournalError, prune_saves
+from src.classes.World import World
+from src.singletons.GamePrint import gamePrint
+from src.singletons.Locale import locale as loc
+
+# Telnet clients may send option negotiation (IAC ...) before and between lines
+TELNET_NEGOTIATION = re.compile(rb'\xff[\xfb-\xfe].|\xff[\xf0-\xfa]', re.DOTALL)
+
+@dataclass
+class Session:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    output: io.StringIO = field(default_factory=io.StringIO)
+    journal: Journal | None = None
+
+    async def flush(self):
+        gamePrint.flush()
+        text = self.output.getvalue()
+        if text:
+            self.output.seek(0)
+            self.output.truncate()
+            self.writer.write(text.encode())
+            await self.writer.drain()
+
+    async def readline(self, timeout: float | None = None) -> str | None:
+        # None when the client did not answer within timeout
+        await self.flush()
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not line:
+            raise ConnectionResetError("client disconnected")
+        return TELNET_NEGOTIATION.sub(b'', line).decode(errors='replace').strip()
+
+@dataclass
+class GameServer:
+    new_world: Callable[[], World] # Called with the session's language selected
+    host: str = '127.0.0.1'
+    port: int = 4000
+    idle_timeout: float = 30 * 60
+    save_directory: str = './saves'
+    save_days: float = 30 # Saves untouched for longer are removed
+    max_saves: int = 10000 # Beyond this many the least recently played are removed
+    prune_every: float = 60 * 60
+    sessions: List[Session] = field(default_factory=list)
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        gamePrint.abs_print(f"Serving on {self.host}:{self.port}")
+        gamePrint.flush()
+        pruning = asyncio.create_task(self.prune())
+        async with server:
+            await server.serve_forever()
+        pruning.cancel()
+
+    async def prune(self):
+        # Every connection gets a save, so without this a public server's saves grow without bound
+        while True:
+            keep = [session.journal.session_id for session in self.sessions if session.journal is not None]
+            await asyncio.to_thread(prune_saves, self.save_directory, self.save_days * 24 * 60 * 60, self.max_saves, keep)
+            await asyncio.sleep(self.prune_every)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Each connection runs in its own task, so output and language set here stay with this session
+        session = Session(reader, writer)
+        gamePrint.set_output(session.output)
+        self.sessions.append(session)
+        try:
+            await self.play(session)
+            await session.flush()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.remove(session)
+            writer.close()
+
+    async def play(self, session: Session):
+        # Sessions are journaled, so a player whose connection or host went away can continue with their code
+        gamePrint.abs_print("Enter your session code to continue a game, or press enter to start a new one.")
+        code = await session.readline(self.idle_timeout)
+        if code is None:
+            return None
+        session.journal = Journal(self.save_directory, code) if Journal.is_valid_id(code) else None
+        if session.journal is not None and any(other.journal is not None and other.journal.session_id == code for other in self.sessions if other is not session):
+            gamePrint.abs_print("That game is being played from another connection.")
+            session.journal = None
+        elif code and (session.journal is None or not session.journal.exists()):
+            gamePrint.abs_print("There is no saved game with that code.")
+            session.journal = None
+
+        # Save files are read and written in a worker thread, so a slow disk holds up only the session waiting on it
+        world = None
+        if session.journal is not None:
+            session.journal.deferred = True
+            saved = await asyncio.to_thread(session.journal.read)
+            loc.set_locale(saved[0]['lang'])
+            world = self.new_world()
+            try:
+                session.journal.resume(world, saved)
+            except JournalError as error:
+                gamePrint.abs_print(str(error))
+                session.journal = world = None
+            else:
+                await asyncio.to_thread(session.journal.write)
+                gamePrint.abs_print(loc.t("inputResponses.sessionResumed"), end="\r\n\r\n")
+                gamePrint.print(world.player.current_area.printable_enter_description)
+        if world is None:
+            gamePrint.abs_print(f"What language would you like to play in? ({', '.join(loc.locale_files.keys())})")
+            lang = await session.readline(self.idle_timeout)
+            if lang is None:
+                return None
+            loc.set_locale(lang)
+            world = self.new_world()
+            session.journal = Journal(self.save_directory, secrets.token_hex(4), deferred=True)
+            session.journal.start(world)
+            await asyncio.to_thread(session.journal.write)
+
+            gamePrint.abs_print(loc.t("inputResponses.sessionCode", code=session.journal.session_id), end="\r\n\r\n")
+            gamePrint.abs_print(loc.t("general.opening"), end="\r\n\r\n")
+            gamePrint.print(world.player.current_area.printable_enter_description)
+            await self.after_input(session, world)
+        while world.running:
+            world.handle_pre_input()
+            gamePrint.abs_print(f"\r\n{loc.t('inputResponses.waitingInput')}\r\n> ", end="")
+            action = await session.readline(self.idle_timeout)
+            if action is None:
+                return None
+            gamePrint.abs_print("")
+            world.handle_input(action)
+            await self.after_input(session, world)
+        gamePrint.abs_print(loc.t("inputResponses.thankYou"))
+
+    async def after_input(self, session: Session, world: World):
+        world.handle_after_input()
+        while world.pending_defenses:
+            words = world.prompt_defense()
+            world.resolve_defense(words, await session.readline(world.defense_timeout))
+        world.end_turn()
+        if session.journal is not None:
+            await asyncio.to_thread(session.journal.write)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Set, TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.classes.Areas import Area
+    from src.classes.Characters import Character
+    from src.classes.Items import ItemSet
+    from src.classes.Hordes import HordeState
+    from src.classes.Routes import RouteTable
+    from src.classes.Journals import Journal
+
+@dataclass
+class WorldState:
+    # Only what a session changed relative to the shared world; everything else is read from the template
+    area_items: Dict[str, ItemSet] = field(default_factory=dict) # area id -> copy of Area.default_items
+    requirements: Dict[int, int] = field(default_factory=dict) # requirement id -> mask of the items still missing, see TransitionRequirement.remaining
+    fired_events: Set[str] = field(default_factory=set)
+    area_characters: Dict[str, List[Character]] = field(default_factory=dict)
+    enemies: HordeState | None = None # Enemy positions, stepped as a batch
+    routes: RouteTable | None = None # Shortest paths for the requirements fulfilled so far
+    descriptions: Dict[int, Dict[str, str]] = field(default_factory=dict) # area index -> language -> enter description
+    journal: Journal | None = None # Set when the session is saved
+
+    def activate(self):
+        _active_state.set(self)
+
+    def record(self, *entry: Any):
+        if self.journal is not None:
+            self.journal.record(list(entry))
+
+    def add_character(self, character: Character, area: Area):
+        self.area_characters.setdefault(area.id, []).append(character)
+        if character.shown_in_area:
+            self.invalidate((area.index,))
+
+    def move_character(self, character: Character, old_area: Area, new_area: Area):
+        # By identity: NPC is a dataclass without fields, so any two NPCs compare equal
+        characters = self.area_characters[old_area.id]
+        for i, other in enumerate(characters):
+            if other is character:
+                del characters[i]
+                break
+        if character.shown_in_area:
+            self.invalidate((old_area.index,))
+        self.add_character(character, new_area)
+
+    def open_requirement(self, requirement_id: int):
+        if self.routes is not None:
+            self.invalidate(self.routes.index.gated_areas(requirement_id))
+            self.routes = self.routes.open(requirement_id)
+
+    def invalidate(self, area_indexes: Iterable[int]):
+        # Called whenever something an area's enter description shows changes
+        for area_index in area_indexes:
+            self.descriptions.pop(area_index, None)
+
+    def has_enemies(self, area_index: int) -> bool:
+        return self.enemies is not None and self.enemies.counts[area_index] > 0
+
+_active_state = ContextVar[WorldState]('world_state')
+
+def active_state() -> WorldState:
+    return _active_state.get()
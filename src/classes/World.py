@@ -1,11 +1,17 @@
-import os
+from __future__ import annotations
 from typing import List, Any
 from dataclasses import dataclass
+import copy
 from src.classes.DataStores import DataStore, NamableDataStore
 from src.classes.Areas import Area, Group, Exit
-from src.classes.Items import Item
+from src.classes.Items import Item, ItemIndex, ItemSet
 from src.classes.Characters import Character, NPC, Player, Enemy
-from src.classes.Events import Event
+from src.classes.Events import EventIndex
+from src.classes.Parsers import CommandParser, match_name
+from src.classes.Graphs import AreaGraph
+from src.classes.Hordes import Horde
+from src.classes.Routes import RouteIndex
+from src.classes.States import WorldState
 from src.singletons.Locale import locale as loc
 from src.singletons.GamePrint import gamePrint
 import random
@@ -16,21 +22,53 @@ class World:
         self.data_areas = NamableDataStore[Area]()
         self.data_groups = NamableDataStore[Group]()
         self.data_items = NamableDataStore[Item]()
+        self.data_item_index = ItemIndex()
         self.data_exits = DataStore[Exit]()
         self.data_inputs = DataStore[str]()
+        self.data_parser = CommandParser()
         self.data_characters: List[Character] = []
-        self.data_triggers = DataStore[List[Event]]()
+        self.data_triggers = EventIndex()
+        self.data_graph = AreaGraph()
+        self.data_horde = Horde()
+        self.data_routes = RouteIndex()
         self.player: Player # Reference to player in data_characters
         self.running = True
+        self.ended = False # Won or lost through end_game, rather than left with exit
+        self.pending_defenses: List[Enemy] = []
+        self.defense_timeout = 10
+        self.chase = False # Enemies step toward the player instead of wandering
+        self.config_hash = "" # Of the config file it was built from, set by Game.build_world; see Journal.resume
+        self.state = WorldState()
+        self.activate()
+
+    def activate(self):
+        # Areas, requirements and events read session state from the active context
+        self.state.activate()
+
+    def new_session(self) -> World:
+        # Shares every data store with this world; only state and characters are per session
+        session = copy.copy(self)
+        session.state = WorldState()
+        session.running = True
+        session.ended = False
+        session.pending_defenses = []
+        session.data_characters = []
+        session.activate()
+        for character in self.data_characters:
+            session.append_character(character.spawn())
+        session.state.enemies = self.data_horde.spawn()
+        session.state.routes = self.data_routes.initial
+        return session
 
     def append_character(self, character: Character):
+        if isinstance(character, Enemy):
+            # Enemies are shared by all sessions, see build_horde
+            self.data_horde.add(character)
+            return None
         if isinstance(character, Player):
             self.player = character
-            self.data_characters.append(self.player)
-            self.player.current_area.characters.append(self.player)
-        else:
-            self.data_characters.append(character)
-            character.current_area.characters.append(character)
+        self.data_characters.append(character)
+        self.state.add_character(character, character.current_area)
 
     def update_brightness(self, should_print: bool = True):
         if not self.player.current_area.require_light:
@@ -48,25 +86,46 @@ class World:
             gamePrint.abs_print(loc.t("inputResponses.standingStill"), end=" ")
             return None
 
-        parts = action.strip().lower().split(" ")
-
-        cmd = None
-        target = None
-        cmd_group = None
-
-        for i in range(len(parts)):
-            parsed_word = " ".join(parts[:i+1])
-            if self.data_inputs.has(parsed_word):
-                cmd = parsed_word
-                target = " ".join(parts[i+1:])
-                cmd_group = self.data_inputs.get(parsed_word)
-
-        if cmd is None or target is None or cmd_group is None:
+        parsed = self.data_parser.parse(action, self.is_name_present)
+        if parsed is None:
             gamePrint.abs_print(loc.t("inputResponses.commandUnknown"), end=" ")
             return None
-        
+
+        cmd_group, cmd, target = parsed
         self.match_input_command(cmd_group, cmd, target)
     
+    def add_command(self, cmd: str, cmd_group: str):
+        self.data_inputs.add(cmd, cmd_group)
+        self.data_parser.add_command(cmd, cmd_group)
+
+    def build_graph(self):
+        self.data_graph = AreaGraph.from_areas(self.data_areas.values())
+        self.data_routes = RouteIndex.from_graph(self.data_graph)
+        self.state.routes = self.data_routes.initial
+
+    def build_horde(self):
+        # NPCs never move, so the areas enemies must avoid are known once every character is loaded
+        no_go = {npc.current_area.index for npc in self.data_characters if isinstance(npc, NPC)}
+        # Where they spawn is drawn per session by new_session, so a cached world holds no random placement
+        self.data_horde.build(self.data_graph, no_go)
+
+    def index_names(self):
+        for item in self.data_items.values():
+            self.data_parser.add_name(item.name)
+        for area in self.data_areas.values():
+            self.data_parser.add_name(area.name)
+            for direction in area.exits.keys():
+                self.data_parser.add_name(direction)
+        for char in [*self.data_characters, *self.data_horde.enemies]:
+            if isinstance(char.name, str):
+                self.data_parser.add_name(char.name)
+
+    def is_name_present(self, name: str) -> bool:
+        area = self.player.current_area
+        if area.items.has_by_name(name) or area.exits.has(name) or self.player.inventory.has_by_name(name):
+            return True
+        return any(isinstance(char.name, str) and char.name.lower() == name for char in area.characters)
+
     def match_input_command(self, cmd_group: str, cmd: str, target: str):
 
         if cmd_group == "exit":
@@ -78,7 +137,7 @@ class World:
             return None
         
         if cmd_group == "clear":
-            os.system('cls' if os.name == 'nt' else 'clear')
+            gamePrint.clear()
             return None
         
         if cmd_group == "dict":
@@ -91,6 +150,14 @@ class World:
             gamePrint.print(self.player.current_area.printable_enter_description, end=" ")
             return None
         
+        if cmd_group == "route":
+            self.show_route(target)
+            return None
+
+        if cmd_group == "hint":
+            self.give_hint()
+            return None
+        
         if cmd_group == "inventory":
             inventory_items = self.player.inventory.values()
             if not inventory_items:
@@ -109,15 +176,13 @@ class World:
             return None
         
         if cmd_group == "throw":
-            if self.player.inventory.has_by_name(target):
-                item = self.player.inventory.get_by_name(target)
-                if item is not None:
-                    self.player.inventory.remove_by_name(target)
-                    self.player.current_area.items.add(item.id, item)
-                    gamePrint.abs_print(loc.t("inputResponses.throwItem", item=target), end=" ")
-                    self.check_event_trigger('throw', item)
-                else:
-                    gamePrint.abs_print(loc.t("inputResponses.inventoryFail", item=target), end=" ")
+            item = self.find_item(target, self.player.inventory)
+            if item is not None:
+                self.drop_item(item, self.player.current_area)
+                gamePrint.abs_print(loc.t("inputResponses.throwItem", item=item.name.lower()), end=" ")
+                self.check_event_trigger('throw', item)
+            else:
+                gamePrint.abs_print(loc.t("inputResponses.inventoryFail", item=target), end=" ")
             return None
         
         if cmd_group == "go":
@@ -137,16 +202,10 @@ class World:
             return None
         
         if cmd_group == "examine":
-            if self.player.current_area.items.has_by_name(target):
-                item = self.player.current_area.items.get_by_name(target)
-                if item is not None:
-                    gamePrint.abs_print(item.description, end=" ")
-                    self.check_event_trigger('examine', item)
-            elif self.player.inventory.has_by_name(target):
-                item = self.player.inventory.get_by_name(target)
-                if item is not None:
-                    gamePrint.abs_print(item.description, end=" ")
-                    self.check_event_trigger('examine', item)
+            item = self.find_item(target, self.player.current_area.items, self.player.inventory)
+            if item is not None:
+                gamePrint.abs_print(item.description, end=" ")
+                self.check_event_trigger('examine', item)
             else:
                 gamePrint.abs_print(loc.t("inputResponses.cannotExamine"), end=" ")
             return None
@@ -155,8 +214,9 @@ class World:
             if not any(isinstance(char, NPC) for char in self.player.current_area.characters):
                 gamePrint.abs_print(loc.t("inputResponses.noOneToTalkTo"), end=" ")
                 return None
+            name = match_name(target, [char.name for char in self.player.current_area.characters if char is not self.player and isinstance(char.name, str)])
             for char in self.player.current_area.characters:
-                if char.name.lower() == target.lower():
+                if char.name == name:
                     if isinstance(char, NPC):
                         gamePrint.abs_print(char.dialog)
                     else:
@@ -164,60 +224,116 @@ class World:
             return None
         
         if cmd_group == "take":
-            if self.player.current_area.items.has_by_name(target):
-                item = self.player.current_area.items.get_by_name(target)
-                if item is not None and item.isInventoryItem:
-                    self.player.inventory.add(item.id, item)
-                    self.player.current_area.items.remove_by_name(target)
-                    gamePrint.abs_print(loc.t("inputResponses.takeSuccess", item=target), end=" ")
+            item = self.find_item(target, self.player.current_area.items)
+            if item is not None:
+                if item.isInventoryItem:
+                    self.take_item(item, self.player.current_area)
+                    gamePrint.abs_print(loc.t("inputResponses.takeSuccess", item=item.name.lower()), end=" ")
                     self.check_event_trigger('take', item)
                 else:
-                    gamePrint.abs_print(loc.t("inputResponses.takeNotAllowed", item=target), end=" ")
+                    gamePrint.abs_print(loc.t("inputResponses.takeNotAllowed", item=item.name.lower()), end=" ")
                     
             else:
                 gamePrint.abs_print(loc.t("inputResponses.takeDoesNotExist", item=target), end=" ")
             return None
         
         if cmd_group == "use":
-            if self.player.inventory.has_by_name(target):
-                item = self.player.inventory.get_by_name(target)
-                if item is not None:
-                    if item.is_light_item:
-                        self.player.lantern_count = item.light_count
-                        gamePrint.abs_print(loc.t("inputResponses.useSuccess", item=target), end=" ")
-                    else:
-                        is_used = self.player.current_area.use_item(item)
-                        is_used = True if self.check_event_trigger('use', item) else is_used
-                        if not is_used: gamePrint.abs_print(loc.t("inputResponses.useFail"), end=" ")
+            item = self.find_item(target, self.player.inventory)
+            if item is not None:
+                if item.is_light_item:
+                    self.player.lantern_count = item.light_count
+                    gamePrint.abs_print(loc.t("inputResponses.useSuccess", item=item.name.lower()), end=" ")
+                else:
+                    is_used = self.player.current_area.use_item(item)
+                    is_used = True if self.check_event_trigger('use', item) else is_used
+                    if not is_used: gamePrint.abs_print(loc.t("inputResponses.useFail"), end=" ")
             else:
                 gamePrint.abs_print(loc.t("inputResponses.inventoryFail", item=target), end=" ")
             return None
         
         gamePrint.abs_print(loc.t("inputResponses.commandNotExist", cmd_group=cmd_group), end=" ")
 
+    def find_item(self, target: str, *item_sets: ItemSet) -> Item | None:
+        # The item target names, looking in each set in turn: exactly, else forgiving articles, aliases, prefixes and
+        # typos among the items there that are not hidden
+        for items in item_sets:
+            item = items.get_by_name(target)
+            if item is not None:
+                return item
+        for items in item_sets:
+            name = match_name(target, [item.name for item in items.values() if not item.is_hidden])
+            if name is not None:
+                return items.get_by_name(name)
+        return None
+
+    # Every change to where an item is goes through these, so a session's journal sees it
+    def take_item(self, item: Item, area: Area):
+        area.edit_items().remove(item)
+        self.player.inventory.add(item)
+        self.state.record('take', area.id, item.id)
+
+    def drop_item(self, item: Item, area: Area):
+        self.player.inventory.remove(item)
+        area.edit_items().add(item)
+        self.state.record('drop', area.id, item.id)
+
+    def give_item(self, item: Item):
+        self.player.inventory.add(item)
+        self.state.record('give', item.id)
+
+    def place_item(self, item: Item, area: Area):
+        area.edit_items().add(item)
+        self.state.record('place', area.id, item.id)
+
+    def show_route(self, target: str):
+        area = self.data_areas.find_by_name(target)
+        here = self.player.current_area
+        if area is None:
+            gamePrint.abs_print(loc.t("inputResponses.routeUnknown", area=target), end=" ")
+        elif area is here:
+            gamePrint.abs_print(loc.t("inputResponses.routeHere", area=area.name), end=" ")
+        else:
+            path = self.state.routes.path(here.index, area.index)
+            if path is None:
+                gamePrint.abs_print(loc.t("inputResponses.routeBlocked", area=area.name), end=" ")
+            else:
+                distance, edge = path
+                gamePrint.abs_print(loc.t("inputResponses.routeNext", area=area.name, dir=self.data_graph.directions[edge], count=distance), end=" ")
+
+    def give_hint(self):
+        # Points at the closest reachable area where a carried item opens an exit, else the closest with something to take
+        routes = self.state.routes
+        here = self.player.current_area.index
+        inventory = self.player.inventory
+        areas = self.data_graph.areas
+        candidates = {area_index for item_id in inventory.keys() for area_index in self.data_routes.unlocks.get(item_id, ())}
+
+        def can_use(area_index: int) -> bool:
+            return area_index in candidates and any(exit.transitionRequirement.helps_open(inventory) for exit in areas[area_index].exits.values())
+        def can_take(area_index: int) -> bool:
+            return any(item.isInventoryItem and not item.is_hidden for item in areas[area_index].items.values())
+        use = routes.nearest(here, can_use) if candidates else None
+        take = routes.nearest(here, can_take) if use is None else None
+
+        if use is None and take is None:
+            gamePrint.abs_print(loc.t("inputResponses.hintNone"), end=" ")
+            return None
+        kind, (distance, area_index, edge) = ("Use", use) if use is not None else ("Take", take)
+        if distance == 0:
+            gamePrint.abs_print(loc.t(f"inputResponses.hint{kind}Here"), end=" ")
+        else:
+            gamePrint.abs_print(loc.t(f"inputResponses.hint{kind}", area=areas[area_index].name, dir=self.data_graph.directions[edge]), end=" ")
+
     def check_event_trigger(self, trigger: str, target: Any) -> bool:
-        is_used = False
-        if self.data_triggers.has(trigger):
-            for event in self.data_triggers.get(trigger):
-                if event.check_conditions(target, self):
-                    is_used = True
-                    event.apply_affects(self)
-        return is_used
+        return self.data_triggers.dispatch(trigger, target, self)
 
     def handle_pre_input(self):
         # If there are enemies in adjacent rooms to the player, print a message
-        has_enemies_adjacent = False
-        enemies_directions: List[str] = []
-        for exit in self.player.current_area.exits.values():
-            dest = exit.find_dest(self.player.current_area)
-            for char in dest.characters:
-                if isinstance(char, Enemy):
-                    has_enemies_adjacent = True
-                    enemies_directions.append(dest.name)
-                    break
-            if has_enemies_adjacent: break
-        if has_enemies_adjacent:
-            gamePrint.abs_print(loc.t("inputResponses.enemiesAdjacent", directions=loc.conjunction_list(enemies_directions)), end=" ")
+        graph = self.data_graph
+        for edge in graph.edges(self.player.current_area):
+            if self.state.has_enemies(graph.targets[edge]):
+                gamePrint.abs_print(loc.t("inputResponses.enemiesAdjacent", directions=graph.areas[graph.targets[edge]].name), end=" ")
+                break
 
         if self.player.is_hiding:
             gamePrint.abs_print(loc.t("inputResponses.safeToLeaveHiding"), end=" ")
@@ -228,71 +344,69 @@ class World:
     def handle_after_input(self):
         # If player health is 0, end the game
         if self.player.health == 0:
-            self.running = False
+            self.end_game()
             gamePrint.abs_print(loc.t("inputResponses.playerHealthZero"), end=" ")
             return None
         
         self.player.deplete_lantern()
         self.update_brightness(False)
 
-        self_defense_words = loc.t("mechanics.selfDefenseWords")
-
         # Check for enemies in room
-        enemies_in_room = [char for char in self.player.current_area.characters if isinstance(char, Enemy)]
+        enemies = self.state.enemies
+        here = self.player.current_area.index
+        enemies_in_room = enemies.enemies_in(here)
         if enemies_in_room:
             for enemy in enemies_in_room:
                 if self.player.is_hiding:
                     gamePrint.abs_print(loc.t("inputResponses.hidingSafe"), end=" ")
+                elif self.player.inventory.has_by_name('knife'):
+                    # Resolved by the caller through prompt_defense and resolve_defense
+                    self.pending_defenses.append(enemy)
                 else:
-                    if self.player.inventory.has_by_name('knife'):
-                        def prompt_defense_words():
-                            words = random.sample(self_defense_words, 3)
-                            formatted_words = loc.conjunction_list(words)
-                            gamePrint.abs_print(f"{loc.t("inputResponses.attackedCanDefend")} \r\n{formatted_words}", end="\r\n> ")
-            
-                            def input_with_timeout(timeout):
-                                import sys, select
-                                ready, _, _ = select.select([sys.stdin], [], [], timeout)
-                                if ready:
-                                    return sys.stdin.readline()
-                                else:
-                                    raise TimeoutError
-
-                            user_input = ""
-                            try:
-                                user_input = input_with_timeout(10).strip().lower()
-                            except TimeoutError:
-                                gamePrint.abs_print(" ")
-                                gamePrint.abs_print(loc.t("inputResponses.attackedDefenseTooSlow"), end=" ")
-                                return False
-
-                            if all(word in user_input for word in words) or user_input == formatted_words:
-                                gamePrint.abs_print(" ")
-                                return True
-                            else:
-                                gamePrint.abs_print(loc.t("inputResponses.attackedDefenseMistake"), end=" ")
-                                return False
-
-                        if not prompt_defense_words():
-                            self.player.take_damage(enemy)
-                            gamePrint.abs_print(loc.t("inputResponses.attackedDefenseFailure"), end=" ")
-                        else:
-                            gamePrint.abs_print(loc.t("inputResponses.attackedDefenseSuccess"), end=" ")
-                    else:
-                        self.player.take_damage(enemy)
-                        gamePrint.abs_print(loc.t("inputResponses.attackedRegular"), end=" ")
-                while True:
-                    new_area = self.data_areas.get_random([npc.current_area.id for npc in self.data_characters if isinstance(npc, NPC)])
-                    if new_area and new_area != self.player.current_area: 
-                        enemy.current_area = new_area
-                        break
+                    self.player.take_damage(enemy)
+                    gamePrint.abs_print(loc.t("inputResponses.attackedRegular"), end=" ")
+            self.state.invalidate(enemies.relocate(enemies_in_room, here))
         else:
             # Move enemies to adjacent rooms
-            for enemy in self.data_characters:
-                if isinstance(enemy, Enemy):
-                    adjacent_exit = enemy.current_area.exits.get_random([npc.current_area.id for npc in self.data_characters if isinstance(npc, NPC)])
-                    if adjacent_exit:
-                        new_area = adjacent_exit.find_dest(enemy.current_area)
-                        enemy.current_area = new_area
+            self.state.invalidate(enemies.roam(self.state.routes.toward(here) if self.chase else None))
 
         gamePrint.abs_print("")
+
+    def end_turn(self):
+        # Called by the caller once the turn, including any defenses, is resolved
+        if self.state.journal is not None:
+            self.state.journal.end_turn(self)
+
+    def end_game(self):
+        # Won or lost, unlike exit there is nothing left to resume
+        self.running = False
+        self.ended = True
+        if self.state.journal is not None:
+            self.state.journal.discard()
+            self.state.journal = None
+
+    def prompt_defense(self) -> List[str]:
+        words = random.sample(loc.t("mechanics.selfDefenseWords"), 3)
+        gamePrint.abs_print(f"{loc.t('inputResponses.attackedCanDefend')} \r\n{loc.conjunction_list(words)}", end="\r\n> ")
+        return words
+
+    def resolve_defense(self, words: List[str], user_input: str | None):
+        # user_input is None when the player did not answer within defense_timeout
+        enemy = self.pending_defenses.pop(0)
+        is_defended = False
+        if user_input is None:
+            gamePrint.abs_print(" ")
+            gamePrint.abs_print(loc.t("inputResponses.attackedDefenseTooSlow"), end=" ")
+        else:
+            user_input = user_input.strip().lower()
+            if all(word in user_input for word in words) or user_input == loc.conjunction_list(words):
+                gamePrint.abs_print(" ")
+                is_defended = True
+            else:
+                gamePrint.abs_print(loc.t("inputResponses.attackedDefenseMistake"), end=" ")
+
+        if is_defended:
+            gamePrint.abs_print(loc.t("inputResponses.attackedDefenseSuccess"), end=" ")
+        else:
+            self.player.take_damage(enemy)
+            gamePrint.abs_print(loc.t("inputResponses.attackedDefenseFailure"), end=" ")
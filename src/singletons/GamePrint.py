@@ -1,19 +1,72 @@
+from contextvars import ContextVar
 from dataclasses import dataclass
+from typing import TextIO
+import atexit
+import os
 import random
+import sys
 
 @dataclass
 class GamePrint:
-    brightness: int = 100
+    # Kept per context so concurrent sessions each get their own output, buffer and darkness
+    _output = ContextVar[TextIO | None]('gamePrint_output', default=None)
+    _pending = ContextVar[list[str] | None]('gamePrint_pending', default=None)
+    _brightness = ContextVar[int]('gamePrint_brightness', default=100)
+    _is_dark = (True, False)
+
+    @property
+    def brightness(self) -> int:
+        return self._brightness.get()
+
+    @brightness.setter
+    def brightness(self, value: int):
+        self._brightness.set(value)
+
+    @property
+    def output(self) -> TextIO:
+        return self._output.get() or sys.stdout
+
+    @property
+    def pending(self) -> list[str]:
+        pending = self._pending.get()
+        if pending is None:
+            pending = []
+            self._pending.set(pending)
+        return pending
+
+    def set_output(self, output: TextIO):
+        self._output.set(output)
+        self._pending.set([])
+
+    def render(self, text: str) -> str:
+        # Each non-space character is hidden with a chance of 100 - brightness percent
+        darkness = 100 - self.brightness
+        if darkness <= 0:
+            return text
+        is_dark = random.choices(self._is_dark, cum_weights=(darkness, 100), k=len(text))
+        return "".join('.' if dark and char != ' ' else char for char, dark in zip(text, is_dark))
 
     def print(self, text: str, end='\n'):
-        for char in text:
-            if char != ' ' and random.randint(1, 100) <= 100 - self.brightness:
-                print('.', end='')
-            else:
-                print(char, end='')
-        print("", end=end)
+        self.pending.append(self.render(text) + end)
 
     def abs_print(self, text: str, end='\n'):
-        print(text, end=end)
+        self.pending.append(f"{text}{end}")
+
+    def flush(self):
+        # Called once per turn, before waiting on the player
+        pending = self.pending
+        if pending:
+            output = self.output
+            output.write("".join(pending))
+            pending.clear()
+            output.flush()
+
+    def clear(self):
+        if self._output.get() is None:
+            self.flush()
+            os.system('cls' if os.name == 'nt' else 'clear')
+        else:
+            self.abs_print("\033[2J\033[H", end='')
 
-gamePrint = GamePrint()
\ No newline at end of file
+gamePrint = GamePrint()
+atexit.register(gamePrint.flush)
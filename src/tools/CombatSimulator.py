@@ -0,0 +1,121 @@
+from __future__ import annotations
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+try:
+    import numpy as np
+except ImportError: # The simulator then reports that it needs NumPy
+    np = None
+
+MAX_HEALTH = 100 # Player.max_health
+GRID_KEYS = ('damage', 'damage_with_light', 'light_count')
+
+@dataclass
+class CombatPolicy:
+    # How a simulated player behaves each turn, as chances; the world's shape comes from the config
+    encounter: float # an enemy is in the player's area when enemies act
+    dark: float # the area requires light
+    hidable: float # the area lets the player hide
+    hide: float = 0.2 # the player hides this turn
+    defend: float = 0.0 # the player holds the knife and types the defense words in time
+    relight: float = 0.1 # with the lantern out, the player lights one this turn
+
+@dataclass
+class CombatResult:
+    settings: List[Dict[str, int]]
+    survival: Any # setting -> turn -> share of players still alive after it, turn 0 before any
+    encounters: Any # setting -> attacks that got past hiding and defending, per player
+    players: int = 0
+    seconds: float = 0.0
+    lifetimes: List[int | None] = field(default_factory=list) # setting -> turn by which half the players died
+
+def combat_available() -> bool:
+    # The simulator steps every player at once with NumPy and has no slower fallback
+    return np is not None
+
+def combat_defaults(config: Dict[str, Any]) -> Dict[str, List[int]]:
+    # Every value the config uses for the grid's parameters
+    lights = sorted({item.get('lightCount', 0) for item in config['items'] if item['isLightItem']}) or [0]
+    return {
+        'damage': sorted({enemy['damage'] for enemy in config['enemies']}),
+        'damage_with_light': sorted({enemy['damageWithLight'] for enemy in config['enemies']}),
+        'light_count': lights,
+    }
+
+def combat_policy(config: Dict[str, Any], **chances: float) -> CombatPolicy:
+    # An enemy roaming a group stands in any one of its areas with a chance of one in the group's size; summed over
+    # enemies and averaged over areas that leaves one chance in the number of areas per enemy that roams anywhere
+    areas = config['areas']
+    groups = {group_id for area in areas for group_id in area['r_groups']}
+    roaming = sum(enemy['r_roaming_group'] in groups for enemy in config['enemies'])
+    return CombatPolicy(
+        encounter=min(1.0, roaming / max(len(areas), 1)),
+        dark=sum(area['requireLight'] for area in areas) / max(len(areas), 1),
+        hidable=sum(area['isHidable'] for area in areas) / max(len(areas), 1),
+        **chances,
+    )
+
+def combat_grid(values: Dict[str, List[int]]) -> List[Dict[str, int]]:
+    return [dict(zip(GRID_KEYS, combination)) for combination in itertools.product(*(values[key] for key in GRID_KEYS))]
+
+def simulate_combat(settings: List[Dict[str, int]], policy: CombatPolicy, players: int, turns: int, seed: int = 0) -> CombatResult:
+    # Plays players simulated players per setting for turns turns, every setting and player at once, a turn per step
+    # A turn follows a game's: input may light a lantern or hide, then after input the lantern burns down and any
+    # enemy in the area attacks as Player.take_damage would. Hiding in a hidable area is always safe there, since
+    # World.handle_after_input never attacks a hiding player, so hidingSafety never comes into play and is not simulated
+    rng = np.random.default_rng(seed)
+    # One entry per player still alive, all settings side by side; the dead are dropped once they are a quarter of the arrays
+    setting = np.repeat(np.arange(len(settings)), players)
+    damage = np.array([entry['damage'] for entry in settings], dtype=np.int16)[setting]
+    damage_with_light = np.array([entry['damage_with_light'] for entry in settings], dtype=np.int16)[setting]
+    light_count = np.array([entry['light_count'] for entry in settings], dtype=np.int16)[setting]
+    health = np.full(len(setting), MAX_HEALTH, dtype=np.int16)
+    lantern = np.zeros(len(setting), dtype=np.int16)
+    alive = np.ones(len(setting), dtype=bool)
+    living = len(setting)
+    encounters = np.zeros(len(settings), dtype=np.int64)
+    survival = np.ones((len(settings), turns + 1))
+    chances = np.array([policy.relight, policy.hide, policy.hidable, policy.encounter, policy.dark, policy.defend], dtype=np.float32)[:, None]
+    for turn in range(1, turns + 1):
+        if living < len(setting) * 3 // 4:
+            setting, damage, damage_with_light, light_count, health, lantern = (
+                array[alive] for array in (setting, damage, damage_with_light, light_count, health, lantern)
+            )
+            alive = np.ones(len(setting), dtype=bool)
+        relight, hide, hidable, encounter, dark, defend = rng.random((len(chances), len(setting)), dtype=np.float32) < chances
+        # Input, then Player.deplete_lantern: a lantern's count drops by one a turn and stops at 0
+        lantern = np.where((lantern == 0) & relight, light_count, lantern)
+        np.maximum(lantern - 1, 0, out=lantern)
+        # Enemies: light, a lantern still burning or a dark area decide the damage, as in Player.take_damage
+        hit = alive & encounter & ~(hide & hidable) & ~defend
+        health -= np.where(hit, np.where(dark & (lantern == 0), damage, damage_with_light), 0).astype(np.int16)
+        np.maximum(health, 0, out=health)
+        encounters += np.bincount(setting[hit], minlength=len(settings))
+        alive &= health > 0
+        counts = np.bincount(setting[alive], minlength=len(settings))
+        living = int(counts.sum())
+        survival[:, turn] = counts / players
+        if not living:
+            survival[:, turn + 1:] = 0.0
+            break
+    lifetimes = []
+    for row in survival:
+        below = np.flatnonzero(row < 0.5)
+        lifetimes.append(int(below[0]) if len(below) else None)
+    return CombatResult(settings, survival, encounters / players, players, lifetimes=lifetimes)
+
+def combat_report(result: CombatResult, policy: CombatPolicy, turns: int) -> List[str]:
+    checkpoints = sorted({max(1, turns * share // 100) for share in (10, 25, 50, 100)})
+    lines = [
+        f"{result.players} players per setting, {len(result.settings)} setting{'s' if len(result.settings) != 1 else ''}, {turns} turns in {result.seconds:.2f}s",
+        f"per turn: enemy in the area {policy.encounter:.1%}, dark area {policy.dark:.1%}, hidable area {policy.hidable:.1%}, "
+        f"hides {policy.hide:.0%}, defends {policy.defend:.0%}, relights {policy.relight:.0%} when out",
+        f"{'damage':>7}{'in light':>9}{'lantern':>8}" + "".join(f"{f'alive @{turn}':>11}" for turn in checkpoints) + f"{'half dead by':>14}{'hits':>8}",
+    ]
+    for setting, row, lifetime, hits in zip(result.settings, result.survival, result.lifetimes, result.encounters):
+        lines.append(
+            f"{setting['damage']:>7}{setting['damage_with_light']:>9}{setting['light_count']:>8}"
+            + "".join(f"{row[turn]:>11.1%}" for turn in checkpoints)
+            + f"{lifetime if lifetime is not None else f'>{turns}':>14}{hits:>8.2f}"
+        )
+    return lines
@@ -0,0 +1,87 @@
+from __future__ import annotations
+import contextvars
+import io
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+from src.classes.World import World
+from src.singletons.GamePrint import gamePrint
+
+PHASES = ('pre_input', 'input', 'after_input')
+
+@dataclass
+class PlaythroughResult:
+    name: str
+    runs: int = 1
+    finished_runs: int = 0
+    turns: int = 0
+    seconds: Dict[str, float] = field(default_factory=lambda: {phase: 0.0 for phase in PHASES})
+    transcript: str = ""
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+def read_script(path: str) -> List[str]:
+    # One command per line, lines starting with # are comments
+    with open(path, 'r') as f:
+        return [line.rstrip('\r\n') for line in f if not line.startswith('#')]
+
+def play_script(template: World, name: str, commands: List[str], seed: int) -> PlaythroughResult:
+    # Runs in its own context so the session's state, output and brightness don't leak between runs
+    def play() -> PlaythroughResult:
+        random.seed(seed)
+        result = PlaythroughResult(name)
+        output = io.StringIO()
+        gamePrint.set_output(output)
+        world = template.new_session()
+        seconds = result.seconds
+        lines = iter(commands)
+
+        start = time.perf_counter()
+        world.handle_after_input()
+        seconds['after_input'] += time.perf_counter() - start
+        for action in lines:
+            if not world.running:
+                break
+            start = time.perf_counter()
+            world.handle_pre_input()
+            mid = time.perf_counter()
+            world.handle_input(action)
+            end = time.perf_counter()
+            world.handle_after_input()
+            # Knife defenses take the next script line as the answer, a missing line times out
+            while world.pending_defenses:
+                world.resolve_defense(world.prompt_defense(), next(lines, None))
+            seconds['pre_input'] += mid - start
+            seconds['input'] += end - mid
+            seconds['after_input'] += time.perf_counter() - end
+            result.turns += 1
+
+        gamePrint.flush()
+        result.transcript = output.getvalue()
+        result.finished_runs = 0 if world.running else 1
+        return result
+    return contextvars.copy_context().run(play)
+
+def headless_report(results: List[PlaythroughResult]) -> List[str]:
+    # One row per script with its repeated runs merged, then the total over every script
+    names = dict.fromkeys(result.name for result in results)
+    rows = [merge_results(name, [result for result in results if result.name == name]) for name in names]
+    lines = [f"{'script':<28}{'runs':>6}{'ended':>7}{'turns':>8}{'turns/s':>10}" + "".join(f"{phase + ' us':>16}" for phase in PHASES)]
+    for row in rows + [merge_results("total", results)]:
+        turns = max(row.turns, 1)
+        rate = row.turns / row.total_seconds if row.total_seconds else 0.0
+        lines.append(f"{row.name:<28}{row.runs:>6}{row.finished_runs:>7}{row.turns:>8}{rate:>10.0f}" + "".join(f"{row.seconds[phase] / turns * 1e6:>16.1f}" for phase in PHASES))
+    return lines
+
+def merge_results(name: str, results: List[PlaythroughResult]) -> PlaythroughResult:
+    merged = PlaythroughResult(name, runs=0)
+    for result in results:
+        merged.runs += result.runs
+        merged.finished_runs += result.finished_runs
+        merged.turns += result.turns
+        for phase in PHASES:
+            merged.seconds[phase] += result.seconds[phase]
+    return merged
@@ -0,0 +1,51 @@
+from __future__ import annotations
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from src.classes.World import World
+from src.singletons.Locale import locale as loc
+
+def instance_size(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+def world_objects(world: World) -> Iterator[Any]:
+    for item in world.data_items.values():
+        yield item
+    for group in world.data_groups.values():
+        yield group
+    for area in world.data_areas.values():
+        yield area
+        for exit in area.exits.values():
+            # Exits are shared by both areas, only count them from the first side
+            if exit.areas[0] is area:
+                yield exit
+                yield exit.transitionRequirement
+    for events in world.data_triggers.data.values():
+        for event in events:
+            yield event
+            yield from event.additional_conditions
+            yield from event.affects
+
+def memory_report(build: Callable[[], World]) -> List[str]:
+    # Compile the catalog first so only the world itself is traced
+    loc.set_locale(loc.current_lang)
+    tracemalloc.start()
+    world = build()
+    traced, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sizes: Dict[str, Tuple[int, int]] = {}
+    for obj in world_objects(world):
+        count, total = sizes.get(obj.__class__.__name__, (0, 0))
+        sizes[obj.__class__.__name__] = (count + 1, total + instance_size(obj))
+
+    lines = [f"{'class':<24}{'count':>8}{'bytes':>12}{'bytes/obj':>12}"]
+    for name, (count, total) in sorted(sizes.items(), key=lambda entry: -entry[1][1]):
+        lines.append(f"{name:<24}{count:>8}{total:>12}{total // count:>12}")
+    lines.append(f"{'instances total':<32}{sum(total for _, total in sizes.values()):>12}")
+    lines.append(f"{'world traced':<32}{traced:>12}")
+    lines.append(f"{'load peak':<32}{peak:>12}")
+    return lines
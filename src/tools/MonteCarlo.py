@@ -0,0 +1,163 @@
+from __future__ import annotations
+import contextvars
+import io
+import multiprocessing
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List
+from src.classes.World import World
+from src.singletons.GamePrint import gamePrint
+from src.singletons.Locale import locale as loc
+
+# Sessions handed to a worker at a time; enough to hide the pool's overhead, few enough to keep every worker busy
+MAX_BATCH = 256
+
+@dataclass
+class MonteCarloResult:
+    # Outcomes summed over sessions; results of separate batches merge by adding them up
+    sessions: int = 0
+    won: int = 0
+    died: int = 0
+    exited: int = 0 # left with the exit command before the game ended
+    turns: int = 0
+    win_turns: Counter = field(default_factory=Counter) # turns taken -> sessions won in that many
+    deaths: Counter = field(default_factory=Counter) # area index -> sessions that died there
+    damage: Counter = field(default_factory=Counter) # area index -> health lost there
+
+    def merge(self, other: MonteCarloResult):
+        self.sessions += other.sessions
+        self.won += other.won
+        self.died += other.died
+        self.exited += other.exited
+        self.turns += other.turns
+        self.win_turns.update(other.win_turns)
+        self.deaths.update(other.deaths)
+        self.damage.update(other.damage)
+
+def random_command(world: World, rng: random.Random, verbs: Dict[str, str]) -> str:
+    # A player with no plan: mostly wanders, and now and then takes, uses, examines or throws what is at hand or hides
+    area = world.player.current_area
+    graph = world.data_graph
+    visible = [item for item in area.items.values() if not item.is_hidden]
+    held = world.player.inventory.values()
+    roll = rng.random()
+    if roll < 0.5 and graph.degree(area):
+        return f"{verbs['go']} {graph.directions[rng.choice(graph.edges(area))]}"
+    if roll < 0.7 and visible:
+        return f"{verbs['take']} {rng.choice(visible).name}"
+    if roll < 0.85 and held:
+        return f"{verbs['use']} {rng.choice(held).name}"
+    if roll < 0.9 and visible:
+        return f"{verbs['examine']} {rng.choice(visible).name}"
+    if roll < 0.95 and area.is_hidable:
+        return verbs['hide']
+    if roll < 0.97 and held:
+        return f"{verbs['throw']} {rng.choice(held).name}"
+    return verbs['pass']
+
+def play_session(template: World, seed: int, max_turns: int, defense: float, script: List[str] | None, result: MonteCarloResult):
+    # One seeded session of the random player, or of script when given, added to result
+    # Enemies, combat and damage run exactly as in a game; only the output is thrown away
+    def play():
+        random.seed(seed)
+        rng = random.Random(f"agent {seed}")
+        gamePrint.set_output(io.StringIO())
+        world = template.new_session()
+        player = world.player
+        verbs = {group: loc.t(f"commands.{group}")[0] for group in ('go', 'take', 'use', 'examine', 'throw', 'hide', 'pass')}
+        lines = iter(script) if script is not None else None
+
+        def after_input():
+            area, health = player.current_area.index, player.health
+            world.handle_after_input()
+            # Scripts answer knife defenses with their next line, as headless runs do; the random player gets it right with chance defense
+            while world.pending_defenses:
+                words = world.prompt_defense()
+                if lines is not None:
+                    answer = next(lines, None)
+                else:
+                    answer = " ".join(words) if rng.random() < defense else None
+                world.resolve_defense(words, answer)
+            if player.health < health:
+                result.damage[area] += health - player.health
+            gamePrint.pending.clear()
+
+        after_input()
+        turns = 0
+        while world.running and player.health > 0 and turns < max_turns:
+            action = random_command(world, rng, verbs) if lines is None else next(lines, None)
+            if action is None:
+                break
+            world.handle_pre_input()
+            world.handle_input(action)
+            after_input()
+            turns += 1
+
+        result.sessions += 1
+        result.turns += turns
+        if player.health == 0:
+            result.died += 1
+            result.deaths[player.current_area.index] += 1
+        elif world.ended:
+            result.won += 1
+            result.win_turns[turns] += 1
+        elif not world.running:
+            result.exited += 1
+    contextvars.copy_context().run(play)
+
+# The world each worker plays, set once per worker by start_worker rather than sent with every batch
+template_world: World | None = None
+
+def start_worker(template: World, locale_files: Dict[str, str], lang: str):
+    # Forked workers already hold the parent's world and locale; spawned ones get them pickled once here
+    global template_world
+    template_world = template
+    if loc.locale_files != locale_files:
+        loc.use_files(locale_files)
+    loc.set_locale(lang)
+
+def play_batch(first_seed: int, count: int, max_turns: int, defense: float, scripts: List[List[str]]) -> MonteCarloResult:
+    result = MonteCarloResult()
+    for seed in range(first_seed, first_seed + count):
+        play_session(template_world, seed, max_turns, defense, scripts[seed % len(scripts)] if scripts else None, result)
+    return result
+
+def monte_carlo(template: World, sessions: int, processes: int = 1, max_turns: int = 500, seed: int = 0, defense: float = 0.5, scripts: List[List[str]] | None = None) -> MonteCarloResult:
+    # Session i plays seed + i wherever it runs, so the totals do not depend on the number of processes
+    scripts = scripts or []
+    if processes <= 1:
+        start_worker(template, loc.locale_files, loc.current_lang)
+        return play_batch(seed, sessions, max_turns, defense, scripts)
+    batch = max(1, min(MAX_BATCH, sessions // (processes * 8)))
+    starts = list(range(seed, seed + sessions, batch))
+    counts = [min(batch, seed + sessions - start) for start in starts]
+    # Forking hands every worker the loaded world without pickling it
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    result = MonteCarloResult()
+    with ProcessPoolExecutor(processes, context, start_worker, (template, dict(loc.locale_files), loc.current_lang)) as pool:
+        for part in pool.map(play_batch, starts, counts, [max_turns] * len(starts), [defense] * len(starts), [scripts] * len(starts)):
+            result.merge(part)
+    return result
+
+def monte_carlo_report(world: World, result: MonteCarloResult, seconds: float, processes: int, max_turns: int, top: int = 10) -> List[str]:
+    sessions = max(result.sessions, 1)
+    lines = [
+        f"{'sessions':<16}{result.sessions:>10} in {seconds:.2f}s on {processes} process{'es' if processes != 1 else ''}"
+        f" ({result.sessions / seconds if seconds else 0:.0f} sessions/s, {result.turns / seconds if seconds else 0:.0f} turns/s)",
+        f"{'won':<16}{result.won:>10} ({result.won / sessions:.1%})",
+        f"{'died':<16}{result.died:>10} ({result.died / sessions:.1%})",
+        f"{'exited':<16}{result.exited:>10} ({result.exited / sessions:.1%})",
+        f"{'still playing':<16}{result.sessions - result.won - result.died - result.exited:>10} after {max_turns} turns or the end of their script",
+    ]
+    if result.won:
+        turns = sorted(result.win_turns.elements())
+        lines.append(f"turns to win      mean {sum(turns) / len(turns):.1f}, median {turns[len(turns) // 2]}, 90th percentile {turns[len(turns) * 9 // 10]}, fewest {turns[0]}")
+    if result.damage:
+        areas = world.data_graph.areas
+        lines.append(f"{'most damaging areas':<32}{'damage':>10}{'per session':>13}{'deaths':>8}")
+        for area_index, damage in result.damage.most_common(top):
+            lines.append(f"  {areas[area_index].name:<30}{damage:>10}{damage / sessions:>13.2f}{result.deaths[area_index]:>8}")
+    return lines
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import gc
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List
+from src.classes.World import World
+from src.tools.Headless import play_script
+from src.tools.WorldGenerator import generate_world, write_world
+try:
+    import resource
+except ImportError: # Not on Windows, peak memory is then left out
+    resource = None
+
+def peak_rss_mb() -> float:
+    # ru_maxrss only ever grows, so sizes are best run smallest first
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def scaling_commands(config: Dict[str, Any], locale: Dict[str, Any], turns: int, seed: int) -> List[str]:
+    # Wandering along the generated exits mixed with the commands whose cost grows with the world: hints, routes and taking what is there
+    # Locked exits are tried like any other, the player then just stays where they are
+    rng = random.Random(seed)
+    areas = {area['id']: area for area in config['areas']}
+    area = areas[config['general']['player']['startingState']['r_area']]
+    commands = []
+    for _ in range(turns):
+        roll = rng.random()
+        if roll < 0.6 and area['exits']:
+            exit = rng.choice(area['exits'])
+            commands.append(f"go {exit['c_direction']}")
+            if 'requirement' not in exit:
+                area = areas[exit['r_pointer']]
+        elif roll < 0.7:
+            commands.append("hint")
+        elif roll < 0.8:
+            commands.append(f"route {locale['areas'][rng.choice(config['areas'])['id']]['name']}")
+        elif area['items']:
+            commands.append(f"take {locale['items'][rng.choice(area['items'])]['name']}")
+        else:
+            commands.append("look")
+    return commands
+
+def scaling_report(sizes: List[int], directory: str, load: Callable[[str], World], turns: int = 200, seed: int = 0) -> List[str]:
+    # Generates a world per size into directory/<size>, loads it through load and plays a generated script on a new session
+    lines = [f"{'areas':>8}{'generate s':>12}{'write s':>10}{'load s':>10}{'session ms':>12}{'turns':>7}{'turns/s':>10}{'peak MB':>10}"]
+    for size in sizes:
+        world_directory = os.path.join(directory, str(size))
+        start = time.perf_counter()
+        config, locale = generate_world(size, seed)
+        generated = time.perf_counter()
+        write_world(world_directory, config, locale)
+        written = time.perf_counter()
+        commands = scaling_commands(config, locale, turns, seed)
+        del config, locale
+        loading = time.perf_counter()
+        world = load(world_directory)
+        loaded = time.perf_counter()
+        world.new_session()
+        session = time.perf_counter()
+
+        result = play_script(world, f"scaling {size}", commands, seed)
+        rate = result.turns / result.total_seconds if result.total_seconds else 0.0
+        lines.append(
+            f"{size:>8}{generated - start:>12.2f}{written - generated:>10.2f}{loaded - loading:>10.2f}"
+            f"{(session - loaded) * 1e3:>12.2f}{result.turns:>7}{rate:>10.0f}{peak_rss_mb():>10.0f}"
+        )
+        del world, result
+        gc.collect()
+    return lines
@@ -0,0 +1,585 @@
+from __future__ import annotations
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, FrozenSet, List, Set, Tuple
+from src.classes.Areas import TransitionRequirement
+from src.classes.Events import Event, end_game, fulfil_exit, give_item, place_item, player_has_item, player_in_area, show_dialog, take_item
+from src.classes.Items import Item
+from src.classes.World import World
+
+# Effects of a compiled event as the search applies them: (kind, local item bit or direction)
+WIN, GIVE, TAKE, PLACE, FULFIL = range(5)
+FAR = 1 << 30 # Distance to an area that cannot be reached
+EFFECTS = {end_game: WIN, give_item: GIVE, take_item: TAKE, place_item: PLACE, fulfil_exit: FULFIL}
+ITEM_EFFECTS = (give_item, take_item, place_item)
+
+# A search state: area index, carried items, default item placements taken, requirement conditions met,
+# one-shot events fired (all bitmasks over the relevant ones only) and items put down outside their default place
+State = Tuple[int, int, int, int, int, FrozenSet[Tuple[int, int]]]
+# trigger target, area it must fire in or -1, carried items it needs, fired bit or 0 when it can fire again, effects
+Rule = Tuple[int, int, int, int, List[Tuple[int, Any]]]
+# A rule that wins: its rules key and position, area it fires in or -1, commands after getting there,
+# item bit it is triggered with when that has to be carried or -1, and (slot, area index) of the places that item lies
+Win = Tuple[Tuple[str, int], int, int, int, int, List[Tuple[int, int]] | None]
+
+def world_events(world: World) -> List[Tuple[str, Event]]:
+    return [(trigger, event) for (trigger, _), events in world.data_triggers.data.items() for event in events]
+
+def event_needs(event: Event) -> Tuple[Set[int], List[Item]]:
+    # Area indexes and items the additional conditions of an event ask for
+    areas, items = set(), []
+    for check in event.additional_conditions:
+        if check.func is player_in_area:
+            areas.add(check.args[0].index)
+        elif check.func is player_has_item:
+            items.append(check.args[0])
+        else:
+            raise ValueError(f"event '{event.id}' has a condition the solvability report does not know: {check.func.__name__}")
+    return areas, items
+
+def event_effects(event: Event) -> List[Tuple[Any, Any]]:
+    effects = [(affect.func, affect.args[0]) for affect in event.affects]
+    for func, _ in effects:
+        if func not in EFFECTS and func is not show_dialog:
+            raise ValueError(f"event '{event.id}' has an affect the solvability report does not know: {func.__name__}")
+    return effects
+
+@dataclass
+class Reachability:
+    # What a player can ever get to, ignoring enemies; found by letting every gain add up, which is exact
+    # here since nothing in the game takes a way, an item or an event away for good
+    areas: Set[int] = field(default_factory=set) # area indexes
+    items: Set[int] = field(default_factory=set) # item indexes seen in a reachable area or carried
+    held: Set[int] = field(default_factory=set) # item indexes that can be carried
+    events: Set[str] = field(default_factory=set)
+    won: bool = False
+
+def reachability(world: World) -> Reachability:
+    graph, routes = world.data_graph, world.data_routes
+    start = world.player.current_area.index
+    found = Reachability()
+    opened: Set[int] = set()
+    locations: Dict[int, Set[int]] = {} # item index -> area indexes it is in
+    waiting: Dict[int, List[TransitionRequirement]] = {} # item index -> locked requirements that need it
+    for area in graph.areas:
+        for item in area.default_items.values():
+            locations.setdefault(item.index, set()).add(area.index)
+    for exit in graph.exits:
+        for item in exit.transitionRequirement.need.values():
+            waiting.setdefault(item.index, []).append(exit.transitionRequirement)
+    queue: List[int] = []
+
+    def is_open(requirement: TransitionRequirement) -> bool:
+        return not requirement.need.mask or requirement.id in opened
+
+    def reach(area_index: int):
+        if area_index not in found.areas:
+            found.areas.add(area_index)
+            queue.append(area_index)
+
+    def open_requirement(requirement: TransitionRequirement):
+        if requirement.id not in opened:
+            opened.add(requirement.id)
+            for edge in routes.locks.get(requirement.id, ()):
+                if routes.sources[edge] in found.areas:
+                    reach(graph.targets[edge])
+
+    def see(item: Item):
+        found.items.add(item.index)
+        if item.isInventoryItem:
+            hold(item)
+
+    def hold(item: Item):
+        if item.index not in found.held:
+            found.held.add(item.index)
+            found.items.add(item.index)
+            for requirement in waiting.get(item.index, ()):
+                if all(needed.index in found.held for needed in requirement.need.values()):
+                    open_requirement(requirement)
+
+    def sites(trigger: str, event: Event) -> List[int]:
+        # Reachable areas the event can fire in
+        areas, items = event_needs(event)
+        if len(areas) > 1 or any(item.index not in found.held for item in items):
+            return []
+        target = event.trigger_data
+        if trigger == 'go':
+            entered = target.index != start or any(is_open(graph.exits[edge].transitionRequirement) for edge in graph.edges(target))
+            candidates = [target.index] if target.index in found.areas and entered else []
+        elif trigger == 'take':
+            candidates = [area_index for area_index in locations.get(target.index, ()) if area_index in found.areas] if target.isInventoryItem else []
+        elif trigger == 'examine' and target.index not in found.held:
+            candidates = [area_index for area_index in locations.get(target.index, ()) if area_index in found.areas]
+        elif target.index in found.held and not (trigger == 'use' and target.is_light_item):
+            candidates = list(found.areas if not areas else areas & found.areas)
+        else:
+            candidates = []
+        return [area_index for area_index in candidates if not areas or area_index in areas]
+
+    reach(start)
+    for item in world.player.inventory.values():
+        hold(item)
+    pending = world_events(world)
+    while True:
+        while queue:
+            area = graph.areas[queue.pop()]
+            for item in area.default_items.values():
+                see(item)
+            for edge in graph.edges(area):
+                if is_open(graph.exits[edge].transitionRequirement):
+                    reach(graph.targets[edge])
+        fired = []
+        for trigger, event in pending:
+            event_sites = sites(trigger, event)
+            if not event_sites:
+                continue
+            fired.append(event)
+            found.events.add(event.id)
+            for func, data in event_effects(event):
+                if func is end_game:
+                    found.won = True
+                elif func is give_item:
+                    hold(data)
+                for area_index in event_sites:
+                    if func is take_item and area_index in locations.get(data.index, ()):
+                        hold(data)
+                    elif func is place_item:
+                        locations.setdefault(data.index, set()).add(area_index)
+                        see(data)
+                    elif func is fulfil_exit:
+                        exit = graph.areas[area_index].exits.get_safe(data)
+                        if exit is not None:
+                            open_requirement(exit.transitionRequirement)
+        if not fired and not queue:
+            return found
+        pending = [(trigger, event) for trigger, event in pending if event.id not in found.events]
+
+@dataclass
+class SearchResult:
+    commands: List[str] | None # None when there is no win or max_states were searched first
+    states: int
+    bound: int # fewest commands a win can take, as far as the search got
+
+@dataclass
+class StateSpace:
+    # The world reduced to what can matter for winning, for a shortest path search over its states
+    # Only events that end the game or open an exit, and the items and events those need, are kept; nothing else wins sooner
+    start: State
+    offsets: List[int]
+    targets: List[int]
+    directions: List[str]
+    edge_bits: List[int] # edge -> condition bits that must all be met to pass it
+    use_bits: List[Dict[int, int]] # area index -> item bit -> condition bits using it there meets
+    fulfil_bits: List[Dict[str, int]] # area index -> direction -> condition bits of that exit
+    slots: List[List[Tuple[int, int]]] # area index -> (slot, item bit) of relevant items placed there by default
+    slot_of: Dict[Tuple[int, int], int]
+    item_names: List[str]
+    takeable: int # item bits that can be carried
+    usable: int # item bits that use checks exits and events for, all but lights
+    rules: Dict[Tuple[str, int], List[Rule]] # (trigger, area index or item bit) -> rules in dispatch order
+    wins: List[Win]
+    rows: Dict[int, List[int]] # area index -> distances from it with every exit open
+    bounds: Dict[int, List[int]] # win area index -> fewest commands to it through an exit still locked, from every area
+    key_conditions: Dict[int, int] # item bit -> condition bits using it meets
+    locks: Dict[int, List[int]] # item bit -> areas of the exits it opens
+    landmarks: List[List[int]] # distances from a few far apart areas, see alt_distance
+    open_rows: Dict[Tuple[int, int], List[int]] = field(default_factory=dict) # (win area index, conditions) -> distances through open exits
+    throughs: Dict[Tuple[int, int, int], int] = field(default_factory=dict) # (win area index, item bit, area index) -> fewest commands to win by using it
+
+    @classmethod
+    def from_world(cls, world: World) -> StateSpace:
+        graph = world.data_graph
+        n = len(graph.areas)
+        events = world_events(world)
+        relevant_events = {event.id for _, event in events if any(func in (end_game, fulfil_exit) for func, _ in event_effects(event))}
+        relevant_items = {item.index for exit in graph.exits for item in exit.transitionRequirement.need.values()}
+        while True:
+            size = len(relevant_events) + len(relevant_items)
+            for trigger, event in events:
+                effects = event_effects(event)
+                if event.id not in relevant_events and any(func in ITEM_EFFECTS and data.index in relevant_items for func, data in effects):
+                    relevant_events.add(event.id)
+                if event.id in relevant_events:
+                    if trigger != 'go':
+                        relevant_items.add(event.trigger_data.index)
+                    relevant_items.update(item.index for item in event_needs(event)[1])
+            if len(relevant_events) + len(relevant_items) == size:
+                break
+
+        items = world.data_item_index.items
+        bit_of = {index: bit for bit, index in enumerate(sorted(relevant_items))}
+        item_names = [items[index].name for index in sorted(relevant_items)]
+        takeable = sum(1 << bit for index, bit in bit_of.items() if items[index].isInventoryItem)
+        usable = sum(1 << bit for index, bit in bit_of.items() if not items[index].is_light_item)
+
+        condition_bits: Dict[int, Dict[int, int]] = {} # requirement id -> item index -> condition bit
+        edge_bits, use_bits, fulfil_bits = [], [{} for _ in range(n)], [{} for _ in range(n)]
+        offset = 0
+        for exit in graph.exits:
+            requirement = exit.transitionRequirement
+            if requirement.id not in condition_bits:
+                condition_bits[requirement.id] = {item.index: 1 << (offset + k) for k, item in enumerate(requirement.need.values())}
+                offset += len(condition_bits[requirement.id])
+            edge_bits.append(sum(condition_bits[requirement.id].values()))
+        for area in graph.areas:
+            for edge in graph.edges(area):
+                bits = condition_bits[graph.exits[edge].transitionRequirement.id]
+                for index, condition in bits.items():
+                    use_bits[area.index][bit_of[index]] = use_bits[area.index].get(bit_of[index], 0) | condition
+                fulfil_bits[area.index][graph.directions[edge]] = edge_bits[edge]
+
+        slots: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        slot_of: Dict[Tuple[int, int], int] = {}
+        for area in graph.areas:
+            for item in area.default_items.values():
+                if item.index in bit_of:
+                    slot_of[(area.index, bit_of[item.index])] = len(slot_of)
+                    slots[area.index].append((len(slot_of) - 1, bit_of[item.index]))
+
+        rules: Dict[Tuple[str, int], List[Rule]] = {}
+        wins: List[Win] = []
+        fired_bits = 0
+        places: Dict[int, List[Tuple[int, int]]] = {} # item bit -> (slot, area index) of its default places
+        for where, area_slots in enumerate(slots):
+            for slot, bit in area_slots:
+                places.setdefault(bit, []).append((slot, where))
+        given = {bit_of[data.index] for _, event in events for func, data in event_effects(event) if func in (give_item, take_item) and data.index in bit_of}
+        for trigger, event in events:
+            if event.id not in relevant_events:
+                continue
+            areas, needed = event_needs(event)
+            if len(areas) > 1:
+                continue
+            area = next(iter(areas), -1)
+            effects = []
+            for func, data in event_effects(event):
+                if func in ITEM_EFFECTS:
+                    if data.index in bit_of:
+                        effects.append((EFFECTS[func], bit_of[data.index]))
+                elif func is not show_dialog:
+                    effects.append((EFFECTS[func], data))
+            target = event.trigger_data.index if trigger == 'go' else bit_of[event.trigger_data.index]
+            fired = 1 << fired_bits if event.once else 0
+            fired_bits += event.once
+            key_rules = rules.setdefault((trigger, target), [])
+            key_rules.append((target, area, sum(1 << bit_of[item.index] for item in needed), fired, effects))
+            if any(kind == WIN for kind, _ in effects):
+                site = target if trigger == 'go' else area
+                # An item that has to be carried to win and only lies about can be fetched from nowhere else
+                carried = trigger in ('use', 'throw') and target not in given
+                fetch = places.get(target, []) if carried else None
+                wins.append(((trigger, target), len(key_rules) - 1, site, 0 if trigger == 'go' else 1, target if carried else -1, fetch))
+
+        # Distances with every exit open never overstate the commands left, so the search can use them in its estimate
+        rows = {}
+        for _, _, site, _, _, fetch in wins:
+            for area_index in [site, *(where for _, where in fetch or ())]:
+                if area_index >= 0 and area_index not in rows:
+                    rows[area_index] = distances(graph.offsets, graph.targets, {area_index: 0})
+
+        # A win through an exit that is still locked first has to pick up an item for it and use it, or fire the event
+        # that opens it. Where those are is only known when such items never move and such events fire in one area
+        key_conditions: Dict[int, int] = {} # item bit -> condition bits it meets
+        for bits in condition_bits.values():
+            for index, condition in bits.items():
+                key_conditions[bit_of[index]] = key_conditions.get(bit_of[index], 0) | condition
+        locks: Dict[int, Set[int]] = {} # item bit -> areas of the exits it opens
+        for edge, exit in enumerate(graph.exits):
+            for item in exit.transitionRequirement.need.values():
+                locks.setdefault(bit_of[item.index], set()).add(graph.targets[edge])
+        moved = given | {data for key_rules in rules.values() for *_, effects in key_rules for kind, data in effects if kind == PLACE} | {bit for trigger, bit in rules if trigger == 'throw'}
+        fulfils = [target if trigger == 'go' else area for (trigger, target), key_rules in rules.items() for _, area, _, _, effects in key_rules if any(kind == FULFIL for kind, _ in effects)]
+        landmarks = pick_landmarks(graph.offsets, graph.targets, world.player.current_area.index)
+        bounds = {}
+        if not moved.intersection(key_conditions) and all(site >= 0 for site in fulfils):
+            for site in {site for _, _, site, *_ in wins if site >= 0}:
+                row = rows[site]
+                sources = {where: row[where] for where in fulfils}
+                for bit, lock_areas in locks.items():
+                    for _, where in places.get(bit, ()):
+                        # Taking it and using it, and the way on through the exit it opens
+                        through = min(alt_distance(landmarks, where, lock_area) + row[lock_area] for lock_area in lock_areas)
+                        sources[where] = min(sources.get(where, FAR), 2 + max(row[where], through))
+                bounds[site] = distances(graph.offsets, graph.targets, sources)
+        inventory = sum(1 << bit_of[item.index] for item in world.player.inventory.values() if item.index in bit_of)
+        return cls(
+            start=(world.player.current_area.index, inventory, 0, 0, 0, frozenset()),
+            offsets=graph.offsets, targets=graph.targets, directions=graph.directions,
+            edge_bits=edge_bits, use_bits=use_bits, fulfil_bits=fulfil_bits, slots=slots, slot_of=slot_of,
+            item_names=item_names, takeable=takeable, usable=usable, rules=rules, wins=wins, rows=rows,
+            bounds=bounds, key_conditions=key_conditions, locks={bit: sorted(lock_areas) for bit, lock_areas in locks.items()}, landmarks=landmarks,
+        )
+
+    def only(self, win: int) -> StateSpace:
+        # A copy where only the win-th way to win ends the game
+        rules = dict(self.rules)
+        for k, (key, position, *_) in enumerate(self.wins):
+            if k != win:
+                target, area, needs, fired, effects = rules[key][position]
+                rules[key] = [*rules[key][:position], (target, area, needs, fired, [(kind, data) for kind, data in effects if kind != WIN]), *rules[key][position + 1:]]
+        return replace(self, rules=rules, wins=[self.wins[win]])
+
+    def keep_locked(self) -> StateSpace:
+        # A copy where items are never used on exits, so only exits events open can be passed; a much smaller
+        # space whose wins are wins of the game too, just maybe not the shortest
+        needed = {target for (trigger, target) in self.rules if trigger != 'go'}
+        needed.update(bit for key_rules in self.rules.values() for _, _, needs, _, _ in key_rules for bit in range(needs.bit_length()) if needs >> bit & 1)
+        keys = sum(1 << bit for bit in self.key_conditions if bit not in needed)
+        return replace(
+            self,
+            use_bits=[{} for _ in self.use_bits],
+            takeable=self.takeable & ~keys,
+            bounds={site: [FAR] * len(row) for site, row in self.bounds.items()},
+            open_rows={}, throughs={},
+        )
+
+    def estimate(self, state: State) -> int:
+        # Fewest commands that could still win: the walk to where a win fires with every exit open,
+        # by way of the item it needs when that is not carried yet, plus the command that fires it
+        area, best = state[0], FAR
+        for _, _, site, extra, bit, fetch in self.wins:
+            to_site = self.rows[site][area] if site >= 0 else 0
+            if bit >= 0 and not state[1] >> bit & 1 and not any(placed == bit for _, placed in state[5]):
+                via = [self.rows[where][area] + 1 + (self.rows[site][where] if site >= 0 else 0) for slot, where in fetch if not state[2] >> slot & 1]
+                if not via:
+                    continue
+                to_site = min(via)
+            if site in self.bounds:
+                to_site = max(to_site, self.locked_distance(site, state))
+            best = min(best, to_site + extra)
+        return best
+
+    def locked_distance(self, site: int, state: State) -> int:
+        # Fewest hops to site, either through the exits open in state or through one more that has to be opened first
+        area, conditions = state[0], state[3]
+        row = self.open_rows.get((site, conditions))
+        if row is None:
+            row = self.open_rows[(site, conditions)] = distances(self.offsets, self.targets, {site: 0}, self.edge_bits, conditions)
+        held, best = state[1], self.bounds[site][area]
+        while held:
+            low = held & -held
+            held ^= low
+            needs = self.key_conditions.get(low.bit_length() - 1, 0)
+            if conditions & needs != needs:
+                # Carrying something for a locked exit: only using it there is left before going through
+                key = (site, low.bit_length() - 1, area)
+                through = self.throughs.get(key)
+                if through is None:
+                    to_site = self.rows[site]
+                    through = self.throughs[key] = 1 + max(to_site[area], min(alt_distance(self.landmarks, area, lock_area) + to_site[lock_area] for lock_area in self.locks[key[1]]))
+                best = min(best, through)
+        return min(row[area], best)
+
+    def present(self, state: State | List[Any], area: int, bit: int) -> bool:
+        slot = self.slot_of.get((area, bit))
+        return (slot is not None and not state[2] >> slot & 1) or (area, bit) in state[5]
+
+    def dispatch(self, trigger: str, target: int, state: List[Any]) -> bool:
+        # Fires the rules for a trigger on the mutable state like EventIndex.dispatch does, True once the game is won
+        won = False
+        for _, area, needs, fired, effects in self.rules.get((trigger, target), ()):
+            if state[4] & fired or (area >= 0 and area != state[0]) or state[1] & needs != needs:
+                continue
+            state[4] |= fired
+            for kind, data in effects:
+                if kind == WIN:
+                    won = True
+                elif kind == GIVE:
+                    state[1] |= 1 << data
+                elif kind == TAKE and self.present(state, state[0], data):
+                    self.take(state, data)
+                elif kind == PLACE:
+                    self.put(state, data)
+                elif kind == FULFIL:
+                    state[3] |= self.fulfil_bits[state[0]].get(data, 0)
+        return won
+
+    def take(self, state: List[Any], bit: int):
+        slot = self.slot_of.get((state[0], bit))
+        if slot is not None:
+            state[2] |= 1 << slot
+        state[5] = state[5] - {(state[0], bit)}
+        state[1] |= 1 << bit
+
+    def put(self, state: List[Any], bit: int):
+        slot = self.slot_of.get((state[0], bit))
+        if slot is not None:
+            state[2] &= ~(1 << slot)
+        else:
+            state[5] = state[5] | {(state[0], bit)}
+
+    def moves(self, state: State) -> List[Tuple[str, State, bool]]:
+        # Every command that changes something that matters, with the state it leads to and whether it wins
+        area, inventory, taken, conditions = state[0], state[1], state[2], state[3]
+        moves = []
+        for edge in range(self.offsets[area], self.offsets[area + 1]):
+            if conditions & self.edge_bits[edge] == self.edge_bits[edge]:
+                after = list(state)
+                after[0] = self.targets[edge]
+                won = self.dispatch('go', after[0], after)
+                moves.append((f"go {self.directions[edge]}", tuple(after), won))
+        here = [bit for slot, bit in self.slots[area] if not taken >> slot & 1] + [bit for where, bit in state[5] if where == area]
+        for bit in here:
+            if self.takeable >> bit & 1:
+                after = list(state)
+                self.take(after, bit)
+                moves.append((f"take {self.item_names[bit]}", tuple(after), self.dispatch('take', bit, after)))
+            if ('examine', bit) in self.rules:
+                after = list(state)
+                moves.append((f"examine {self.item_names[bit]}", tuple(after), self.dispatch('examine', bit, after)))
+        bits = inventory
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            bit = low.bit_length() - 1
+            if self.usable >> bit & 1:
+                after = list(state)
+                after[3] |= self.use_bits[area].get(bit, 0)
+                won = self.dispatch('use', bit, after)
+                moves.append((f"use {self.item_names[bit]}", tuple(after), won))
+            if ('throw', bit) in self.rules:
+                after = list(state)
+                after[1] &= ~low
+                self.put(after, bit)
+                won = self.dispatch('throw', bit, after)
+                moves.append((f"throw {self.item_names[bit]}", tuple(after), won))
+            if ('examine', bit) in self.rules and bit not in here:
+                after = list(state)
+                moves.append((f"examine {self.item_names[bit]}", tuple(after), self.dispatch('examine', bit, after)))
+        return moves
+
+    def search(self, max_states: int, weight: int = 1) -> SearchResult:
+        # A* over states with estimate as the heuristic; every command costs one and the estimate never drops by more
+        # than a command, so the first win popped is a shortest one. A weight above one trades that for speed:
+        # the win found is then at most weight times longer than the shortest
+        start = self.start
+        costs: Dict[State, int] = {start: 0}
+        parents: Dict[State, Tuple[State, str]] = {}
+        heap = [(weight * self.estimate(start), 0, 0, start, False)]
+        pushed = 1
+        while heap and len(costs) <= max_states:
+            _, negative_cost, _, state, won = heapq.heappop(heap)
+            if won:
+                commands = []
+                while state in parents:
+                    state, command = parents[state]
+                    commands.append(command)
+                return SearchResult(commands[::-1], len(costs), -negative_cost if weight == 1 else 0)
+            if -negative_cost > costs[state]:
+                continue
+            cost = costs[state] + 1
+            for command, after, after_won in self.moves(state):
+                if after_won:
+                    # A won state is terminal; keep it apart from the same state reached without winning
+                    after = after + ('won',)
+                if after != state and (after not in costs or cost < costs[after]):
+                    costs[after] = cost
+                    parents[after] = (state, command)
+                    heapq.heappush(heap, (cost + (0 if after_won else weight * self.estimate(after)), -cost, pushed, after, after_won))
+                    pushed += 1
+        # Every win still open costs at least the lowest priority left
+        return SearchResult(None, len(costs), heap[0][0] if heap and weight == 1 else 0)
+
+def distances(offsets: List[int], targets: List[int], sources: Dict[int, int], bits: List[int] | None = None, conditions: int = 0) -> List[int]:
+    # Fewest hops to every area from any source, each source starting at its own count, or FAR;
+    # with bits only through edges whose condition bits are all in conditions. Exits lead both ways,
+    # so these are also the hops from every area to the sources
+    found = [FAR] * (len(offsets) - 1)
+    starts = sorted(sources.items(), key=lambda source: source[1])
+    level, hops, k = [], 0, 0
+    while level or k < len(starts):
+        if not level:
+            hops = max(hops, starts[k][1])
+        while k < len(starts) and starts[k][1] <= hops:
+            if found[starts[k][0]] > hops:
+                found[starts[k][0]] = hops
+                level.append(starts[k][0])
+            k += 1
+        next_level = []
+        for area in level:
+            for edge in range(offsets[area], offsets[area + 1]):
+                if found[targets[edge]] > hops + 1 and (bits is None or conditions & bits[edge] == bits[edge]):
+                    found[targets[edge]] = hops + 1
+                    next_level.append(targets[edge])
+        level, hops = next_level, hops + 1
+    return found
+
+def pick_landmarks(offsets: List[int], targets: List[int], start: int, count: int = 8) -> List[List[int]]:
+    # Each next landmark is the area farthest from the ones before, starting from the one farthest from start
+    rows: List[List[int]] = []
+    nearest = distances(offsets, targets, {start: 0})
+    for _ in range(count):
+        landmark = max(range(len(nearest)), key=lambda area: nearest[area] if nearest[area] < FAR else -1)
+        if nearest[landmark] == 0:
+            break
+        rows.append(distances(offsets, targets, {landmark: 0}))
+        nearest = [min(a, b) for a, b in zip(nearest, rows[-1])] if len(rows) > 1 else rows[-1]
+    return rows
+
+def alt_distance(landmarks: List[List[int]], a: int, b: int) -> int:
+    # A lower bound on the hops between a and b: by the triangle inequality neither can be nearer to a landmark
+    # than the other by more than the hops between them
+    return max((abs(row[a] - row[b]) for row in landmarks if row[a] < FAR and row[b] < FAR), default=0)
+
+def search_space(space: StateSpace, max_states: int, weight: int) -> SearchResult:
+    return space.search(max_states, weight)
+
+def shortest_win(space: StateSpace, max_states: int, processes: int = 1, weight: int = 1) -> SearchResult:
+    # With several ways to win and processes > 1, each is searched for in its own process and the shortest kept
+    wins = len(space.wins)
+    if processes <= 1 or wins <= 1:
+        return space.search(max_states, weight)
+    with ProcessPoolExecutor(max_workers=min(processes, wins)) as pool:
+        results = list(pool.map(search_space, [space.only(win) for win in range(wins)], [max_states] * wins, [weight] * wins))
+    found = [result.commands for result in results if result.commands is not None]
+    return SearchResult(
+        min(found, key=len) if found else None,
+        sum(result.states for result in results),
+        min(result.bound for result in results),
+    )
+
+def solvability_report(world: World, processes: int = 1, max_states: int = 200000) -> List[str]:
+    start = time.perf_counter()
+    found = reachability(world)
+    reached = time.perf_counter()
+    graph = world.data_graph
+    items = world.data_item_index.items
+    events = [event for _, event in world_events(world)]
+    lines = []
+
+    def section(label: str, count: int, total: int, missing: List[str]):
+        lines.append(f"{label:<20}{count:>8}/{total}")
+        if missing:
+            lines.append(f"  not reachable: {', '.join(missing[:20])}" + (f" and {len(missing) - 20} more" if len(missing) > 20 else ""))
+
+    section("areas reachable", len(found.areas), len(graph.areas), [area.id for area in graph.areas if area.index not in found.areas])
+    section("items reachable", len(found.items), len(items), [item.id for item in items if item.index not in found.items])
+    section("items obtainable", len(found.held), sum(1 for item in items if item.isInventoryItem), [item.id for item in items if item.isInventoryItem and item.index not in found.held])
+    section("events fireable", len(found.events), len(events), [event.id for event in events if event.id not in found.events])
+    if not found.won:
+        lines.append("winnable: no, no event that ends the game can fire")
+        lines.append(f"searched in {reached - start:.2f}s")
+        return lines
+
+    space = StateSpace.from_world(world)
+    result = shortest_win(space, max_states, processes)
+    commands, states = result.commands, result.states
+    if commands is not None:
+        lines.append(f"winnable: yes, the shortest win takes {len(commands)} commands")
+    else:
+        # Too many states to prove a shortest win; settle for one that leaves locked exits alone, else one at most twice as long
+        for quick_space, weight in ((space.keep_locked(), 1), (space, 2)):
+            quick = shortest_win(quick_space, max_states, processes, weight)
+            states += quick.states
+            if quick.commands is not None:
+                commands = quick.commands
+                break
+        if commands is None:
+            lines.append(f"winnable: yes, but no winning commands were found within {max_states} states")
+        else:
+            lines.append(f"winnable: yes, in {len(commands)} commands; the shortest win takes at least {result.bound}, proving which needs more than {max_states} states")
+    lines.extend(f"  {command}" for command in commands or ())
+    lines.append(f"searched {states} states in {time.perf_counter() - start:.2f}s (reachability {reached - start:.2f}s)")
+    return lines
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import copy
+import json
+import math
+import os
+import random
+from typing import Any, Dict, List, Tuple
+
+# Areas per region group; each region gets one enemy roaming it
+REGION_SIZE = 256
+NOUNS = ['Candle', 'Locket', 'Vase', 'Ledger', 'Bell', 'Compass', 'Doll', 'Goblet', 'Quill', 'Lamp', 'Chest', 'Mask']
+
+def world_paths(directory: str) -> Tuple[str, Dict[str, str]]:
+    # The config and locale files of a world directory, as written by write_world
+    return os.path.join(directory, 'game.config.json'), {'en': os.path.join(directory, 'locale', 'en.json')}
+
+def generate_world(area_count: int, seed: int = 0, config_path: str = './game.config.json', locale_path: str = './locale/en.json') -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # A grid of areas joined east-west along each row, with at least one open way north-south between rows
+    # Locked exits are only ever extra shortcuts, so every key can be reached and every area entered
+    rng = random.Random(seed)
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    with open(locale_path, 'r') as f:
+        locale = copy.deepcopy(json.load(f))
+    text: Dict[str, Dict[str, Any]] = {section: {} for section in ('areas', 'items', 'groups', 'transitionRequirements', 'npcs', 'events')}
+
+    width = max(1, math.ceil(math.sqrt(area_count)))
+    area_ids = [f"area{i}" for i in range(area_count)]
+    areas: List[Dict[str, Any]] = []
+    for i, area_id in enumerate(area_ids):
+        areas.append({
+            'id': area_id,
+            'r_groups': ['world', f"region{i // REGION_SIZE}"],
+            't_name': f"areas.{area_id}.name",
+            't_enterDescription': f"areas.{area_id}.description",
+            'requireLight': i > 0 and rng.random() < 0.1,
+            'isHidable': rng.random() < 0.4,
+            'exits': [],
+            'items': [],
+        })
+        text['areas'][area_id] = {'name': f"Room {i}", 'description': f"You are in room {i} of {area_count}."}
+
+    groups = [('world', "The World")] + [(f"region{r}", f"Region {r}") for r in range(math.ceil(area_count / REGION_SIZE))]
+    config['groups'] = []
+    for group_id, name in groups:
+        config['groups'].append({
+            'id': group_id,
+            't_name': f"groups.{group_id}.name",
+            't_enterDescription': f"groups.{group_id}.enter_description",
+            't_exitDescription': f"groups.{group_id}.exit_description",
+        })
+        text['groups'][group_id] = {'name': name, 'enter_description': f"You enter {name}.", 'exit_description': f"You leave {name}."}
+
+    items: List[Dict[str, Any]] = []
+    def add_item(name: str, description: str, **flags: Any) -> str:
+        item_id = f"item{len(items)}"
+        items.append({
+            'id': item_id,
+            't_name': f"items.{item_id}.name",
+            't_description': f"items.{item_id}.description",
+            'isLightItem': False,
+            'isInventoryItem': True,
+            **flags,
+        })
+        text['items'][item_id] = {'name': name, 'description': description}
+        return item_id
+
+    requirements: List[Dict[str, Any]] = []
+    def join(low: int, high: int, direction: str, back: str, lock: bool):
+        exit: Dict[str, Any] = {'c_direction': direction, 'r_pointer': area_ids[high]}
+        if lock:
+            # The key lies anywhere; without locked exits the grid is still connected, so it can always be fetched
+            requirement_id = f"lock{len(requirements)}"
+            key_id = add_item(f"Key {len(requirements)}", f"A key tagged with the number {len(requirements)}.")
+            areas[rng.randrange(area_count)]['items'].append(key_id)
+            requirements.append({
+                'id': requirement_id,
+                'interactions': [{'r_command': 'examine', 't_response': f"transitionRequirements.{requirement_id}.examine"}],
+                'fulfillCondition': {'r_items': [key_id]},
+                't_unfulfilled_description': f"transitionRequirements.{requirement_id}.unfulfilled_description",
+                't_fulfilled_description': f"transitionRequirements.{requirement_id}.fulfilled_description",
+            })
+            text['transitionRequirements'][requirement_id] = {
+                'examine': f"The door has a lock numbered {len(requirements) - 1}.",
+                'unfulfilled_description': "The door is locked.",
+                'fulfilled_description': "The lock clicks open.",
+            }
+            # Declared on the lower area's side only; the loader accepts either
+            exit['requirement'] = {'r_transitionRequirement': requirement_id, 'stateKey': requirement_id}
+        areas[low]['exits'].append(exit)
+        areas[high]['exits'].append({'c_direction': back, 'r_pointer': area_ids[low]})
+
+    for i in range(area_count):
+        if i % width + 1 < width and i + 1 < area_count:
+            join(i, i + 1, 'east', 'west', False)
+    for row in range(math.ceil(area_count / width) - 1):
+        below = [column for column in range(width) if (row + 1) * width + column < area_count]
+        opened = rng.choice(below)
+        for column in below:
+            if column == opened or rng.random() < 0.3:
+                i = row * width + column
+                join(i, i + width, 'south', 'north', column != opened and rng.random() < 0.2)
+
+    # About one and a half things per area, some of them scenery, lights or hidden
+    for i in range(area_count):
+        for _ in range(1 + (rng.random() < 0.5)):
+            noun = rng.choice(NOUNS)
+            roll = rng.random()
+            if roll < 0.2:
+                item_id = add_item(f"{noun} {len(items)}", f"A {noun.lower()} fixed in place.", isInventoryItem=False)
+            elif roll < 0.25:
+                item_id = add_item(f"Lantern {len(items)}", "A small oil lantern.", isLightItem=True, lightCount=5)
+            elif roll < 0.3:
+                item_id = add_item(f"{noun} {len(items)}", f"A {noun.lower()} tucked out of sight.", isHidden=True)
+            else:
+                item_id = add_item(f"{noun} {len(items)}", f"A dusty {noun.lower()}.")
+            areas[i]['items'].append(item_id)
+    areas[0]['items'].append(add_item(f"Lantern {len(items)}", "A small oil lantern.", isLightItem=True, lightCount=5))
+
+    # Every kind of event the loader knows, spread over the world
+    events: List[Dict[str, Any]] = []
+    def add_event(trigger: str, data: str, conditions: List[Dict[str, str]], affects: List[Dict[str, str]], description: str):
+        event_id = f"event{len(events)}"
+        events.append({
+            'id': event_id,
+            'trigger': {'type': trigger, 'data': data},
+            'additional_conditions': conditions,
+            'affects': [{'type': 'dialog', 'data': f"events.{event_id}.description"}, *affects],
+            'once': True,
+        })
+        text['events'][event_id] = {'description': description}
+
+    for i in range(0, area_count, 50):
+        area = areas[rng.randrange(i, min(i + 50, area_count))]
+        add_event('enter', area['id'], [], [], "A chill runs down your spine.")
+        for item_id in area['items']:
+            item = items[int(item_id[4:])]
+            if not item['isInventoryItem']:
+                note_id = add_item(f"Note {len(items)}", "A folded note.")
+                add_event('examine', item_id, [], [{'type': 'add_item_to_inventory', 'data': note_id}], "Something falls out.")
+            elif not item.get('isHidden'):
+                add_event('take', item_id, [], [], "It is colder than you expected.")
+                add_event('use', item_id, [{'type': 'area', 'data': area['id']}], [], "Nothing happens, but you feel watched.")
+    last = area_count - 1
+    relic_id = add_item("Cleansing Relic", "A relic that could end all of this.")
+    areas[last]['items'].append(relic_id)
+    add_event('throw', relic_id, [{'type': 'area', 'data': area_ids[last]}], [{'type': 'end_game', 'data': ''}], "The relic shatters and the house falls silent.")
+
+    npcs: List[Dict[str, Any]] = []
+    for k in range(max(1, area_count // 200)):
+        npc_id = f"npc{k}"
+        npcs.append({
+            'id': npc_id,
+            't_name': f"npcs.{npc_id}.name",
+            't_dialog': f"npcs.{npc_id}.dialog",
+            'r_area': area_ids[rng.randrange(1, area_count) if area_count > 1 else 0],
+        })
+        text['npcs'][npc_id] = {'name': f"Stranger {k}", 'dialog': "The stranger mutters something you cannot make out."}
+
+    enemies = [
+        {'id': f"ghost{r}", 'damage': 30, 'damageWithLight': 20, 'r_roaming_group': f"region{r}"}
+        for r in range(len(groups) - 1)
+    ]
+
+    config['general']['player']['startingState']['r_area'] = area_ids[0]
+    config.update(areas=areas, events=events, transitionRequirements=requirements, items=items, npcs=npcs, enemies=enemies)
+    locale.update(text)
+    return config, locale
+
+def write_world(directory: str, config: Dict[str, Any], locale: Dict[str, Any]):
+    config_path, locale_files = world_paths(directory)
+    os.makedirs(os.path.dirname(locale_files['en']), exist_ok=True)
+    with open(config_path, 'w') as f:
+        json.dump(config, f)
+    with open(locale_files['en'], 'w') as f:
+        json.dump(locale, f, ensure_ascii=False)
@@ -30,6 +30,7 @@ class ConfigPlayer(TypedDict):
 class ConfigGeneralEnemy(TypedDict):
     t_encounterDialog: str
     damage: int
+    chase: bool
 
 class ConfigGeneral(TypedDict):
     player: ConfigPlayer
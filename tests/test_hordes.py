@@ -0,0 +1,106 @@
+import copy
+import json
+import os
+import random
+import unittest
+from unittest import mock
+import src.classes.Hordes as Hordes
+from src.classes.Loaders import WorldLinker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SINGLES = 10
+PAIRS = 30
+
+def horde_config(config: dict) -> dict:
+    # Gives every enemy a group of one area or of two neighbouring ones, so each step has exactly one possible outcome
+    # and the batched and the one-at-a-time paths can be compared position for position
+    config = copy.deepcopy(config)
+    npc_areas = {npc['r_area'] for npc in config['npcs']}
+    areas = {area['id']: area for area in config['areas']}
+    pairs = sorted({
+        tuple(sorted((area['id'], exit['r_pointer'])))
+        for area in config['areas'] for exit in area['exits']
+        if area['id'] not in npc_areas and exit['r_pointer'] not in npc_areas
+    })
+    singles = [area_id for area_id in areas if area_id not in npc_areas]
+    group = config['groups'][0]
+    config['enemies'] = []
+    for i in range(SINGLES + PAIRS):
+        members = (singles[i],) if i < SINGLES else pairs[i - SINGLES]
+        config['groups'].append({**group, 'id': f"test{i}"})
+        for area_id in members:
+            areas[area_id]['r_groups'].append(f"test{i}")
+        config['enemies'].append({'id': f"enemy{i}", 'damage': 10, 'damageWithLight': 5, 'r_roaming_group': f"test{i}"})
+    return config
+
+class HordeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Locale paths are relative to the repository root
+        os.chdir(ROOT)
+        with open('game.config.json', 'r') as f:
+            config = horde_config(json.load(f))
+        cls.batched = WorldLinker(copy.deepcopy(config)).link()
+        with mock.patch.object(Hordes, 'BATCH_THRESHOLD', 1 << 30):
+            cls.stepped = WorldLinker(config).link()
+
+    def sessions(self, seed: int):
+        random.seed(seed)
+        batched = self.batched.new_session()
+        random.seed(seed)
+        stepped = self.stepped.new_session()
+        return batched.state.enemies, stepped.state.enemies
+
+    def assertSamePositions(self, batched, stepped):
+        self.assertEqual([int(position) for position in batched.positions], list(stepped.positions))
+        self.assertEqual([int(count) for count in batched.counts], list(stepped.counts))
+
+    def test_both_paths_are_built(self):
+        self.assertGreaterEqual(SINGLES + PAIRS, Hordes.BATCH_THRESHOLD)
+        self.assertTrue(self.batched.data_horde.batched)
+        self.assertFalse(self.stepped.data_horde.batched)
+
+    def test_spawn(self):
+        for seed in range(5):
+            batched, stepped = self.sessions(seed)
+            # Only single-area groups leave spawning no choice; pairs may start on either side
+            self.assertEqual([int(position) for position in batched.positions[:SINGLES]], stepped.positions[:SINGLES])
+            for horde, state in ((self.batched.data_horde, batched), (self.stepped.data_horde, stepped)):
+                for enemy, position in zip(horde.enemies, state.positions):
+                    self.assertIn(horde.areas[position], enemy.roaming_group.areas.values())
+
+    def test_roam_relocate_and_chase(self):
+        batched, stepped = self.sessions(0)
+        stepped.restore([int(position) for position in batched.positions])
+        self.assertSamePositions(batched, stepped)
+        routes = self.stepped.data_routes.initial
+        areas = self.stepped.data_graph.areas
+        # Pointing every area at itself makes every enemy chase and so stay, where roaming would move the pairs
+        hold = list(range(len(areas)))
+        for turn in range(20):
+            if turn % 4 == 2:
+                toward = routes.toward(turn % len(areas))
+                self.assertEqual(sorted(batched.roam(toward)), sorted(stepped.roam(toward)))
+            elif turn % 4 == 3:
+                self.assertEqual(batched.roam(hold), [])
+                self.assertEqual(stepped.roam(hold), set())
+            else:
+                self.assertEqual(sorted(batched.roam()), sorted(stepped.roam()))
+            self.assertSamePositions(batched, stepped)
+            for area_index in range(len(areas)):
+                self.assertEqual([enemy.slot for enemy in batched.enemies_in(area_index)], [enemy.slot for enemy in stepped.enemies_in(area_index)])
+        # Sent away from where they stand, pairs can only cross over and singles have nowhere to go
+        enemies = self.stepped.data_horde.enemies
+        for enemy in enemies:
+            avoid = stepped.positions[enemy.slot]
+            batched.relocate([self.batched.data_horde.enemies[enemy.slot]], avoid)
+            stepped.relocate([enemy], avoid)
+            self.assertSamePositions(batched, stepped)
+        old = list(stepped.positions)
+        batched_old = batched.positions.copy()
+        batched.roam()
+        stepped.roam()
+        self.assertEqual(batched.changes(batched_old), stepped.changes(old))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import random
+import unittest
+from src.classes.Items import Item, ItemIndex, ItemSet
+
+class ItemSetTest(unittest.TestCase):
+    def setUp(self):
+        self.index = ItemIndex()
+        self.items = [Item(f"item{i}", f"Item {i}", "") for i in range(100)]
+        for item in self.items:
+            self.index.add(item)
+
+    def test_index_numbers_items_in_order(self):
+        self.assertEqual([item.index for item in self.items], list(range(100)))
+        twin = Item("twin", "ITEM 7", "")
+        self.index.add(twin)
+        self.assertEqual(twin.index, 100)
+        self.assertEqual(self.index.names["item 7"], [7, 100])
+
+    def test_add_holds_and_remove(self):
+        items = self.items
+        item_set = ItemSet(self.index)
+        item_set.add(items[40])
+        self.assertEqual((item_set.base, item_set.mask), (40, 1))
+        # An item below the base shifts the mask onto the new base
+        item_set.add(items[37])
+        item_set.add(items[45])
+        self.assertEqual(item_set.base, 37)
+        self.assertTrue(all(item_set.holds(items[i]) for i in (37, 40, 45)))
+        self.assertFalse(any(item_set.holds(items[i]) for i in (0, 36, 38, 46, 99)))
+        item_set.add(items[40])
+        self.assertEqual(item_set.keys(), ["item37", "item40", "item45"])
+        # Removing the lowest item rebases on the next one
+        item_set.remove(items[37])
+        self.assertEqual((item_set.base, item_set.mask), (40, 1 | 1 << 5))
+        item_set.remove(items[99])
+        item_set.remove(items[0])
+        self.assertEqual(item_set.keys(), ["item40", "item45"])
+        item_set.remove(items[45])
+        item_set.remove(items[40])
+        self.assertEqual(item_set.mask, 0)
+        self.assertEqual(item_set.values(), [])
+
+    def test_values_follow_index_order(self):
+        order = [62, 3, 98, 3, 17, 0]
+        item_set = ItemSet.of(self.index, [self.items[i] for i in order])
+        self.assertEqual(item_set.values(), [self.items[i] for i in sorted(set(order))])
+
+    def test_copy_is_independent(self):
+        item_set = ItemSet.of(self.index, self.items[5:8])
+        copy = item_set.copy()
+        copy.remove(self.items[5])
+        copy.add(self.items[2])
+        self.assertEqual(item_set.keys(), ["item5", "item6", "item7"])
+        self.assertEqual(copy.keys(), ["item2", "item6", "item7"])
+
+    def test_masks_compare_across_bases(self):
+        need = ItemSet.of(self.index, [self.items[i] for i in (10, 12)])
+        inventory = ItemSet.of(self.index, [self.items[i] for i in (4, 10, 30)])
+        self.assertEqual(inventory.bits(need.base), 1 | 1 << 20)
+        self.assertTrue(inventory.intersects(need.mask, need.base))
+        self.assertFalse(inventory.covers(need.mask, need.base))
+        inventory.add(self.items[12])
+        self.assertTrue(inventory.covers(need.mask, need.base))
+        self.assertFalse(ItemSet.of(self.index, [self.items[11]]).intersects(need.mask, need.base))
+
+    def test_names_find_the_held_item(self):
+        twin = Item("twin", "Item 7", "")
+        self.index.add(twin)
+        item_set = ItemSet.of(self.index, [twin, self.items[3]])
+        self.assertIs(item_set.get_by_name("item 7"), twin)
+        self.assertTrue(item_set.has_by_name("ITEM 3"))
+        self.assertIsNone(item_set.get_by_name("item 4"))
+
+    def test_random_changes_match_a_set(self):
+        rng = random.Random(0)
+        item_set, model = ItemSet(self.index), set()
+        for _ in range(2000):
+            item = rng.choice(self.items)
+            if rng.random() < 0.5:
+                item_set.add(item)
+                model.add(item.index)
+            else:
+                item_set.remove(item)
+                model.discard(item.index)
+            self.assertEqual([item.index for item in item_set.values()], sorted(model))
+            if model:
+                self.assertEqual(item_set.base, min(model))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import io
+import json
+import os
+import unittest
+from src.classes.Loaders import WorldLinker
+from src.classes.Parsers import match_name
+from src.singletons.GamePrint import gamePrint
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class NameTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Locale paths are relative to the repository root
+        os.chdir(ROOT)
+        with open('game.config.json', 'r') as f:
+            cls.template = WorldLinker(json.load(f)).link()
+
+    def play(self, area_id: str, action: str) -> str:
+        output = io.StringIO()
+        gamePrint.set_output(output)
+        world = self.template.new_session()
+        world.player.current_area = world.data_areas.get(area_id)
+        world.handle_input(action)
+        gamePrint.flush()
+        return output.getvalue()
+
+    def test_blank_text_matches_nothing(self):
+        self.assertIsNone(match_name("", ["Lantern", "Mansion Key"]))
+        self.assertIsNone(match_name("   ", ["Lantern", "Mansion Key"]))
+        self.assertEqual(match_name("the lanturn", ["Lantern", "Mansion Key"]), "Lantern")
+
+    def test_bare_commands_act_on_nothing(self):
+        self.assertIn("doesn't exist here", self.play('entrance', "take"))
+        self.assertIn("You can't examine that", self.play('entrance', "examine"))
+        self.assertIn("in your inventory", self.play('entrance', "use"))
+        self.assertIn("in your inventory", self.play('entrance', "throw"))
+
+    def test_talk_never_picks_the_player(self):
+        name = self.template.player.name
+        self.assertNotIn(name, self.play('familyHall', "talk"))
+        self.assertNotIn(name, self.play('familyHall', f"talk {name}"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import random
+import unittest
+from unittest import mock
+import src.classes.Routes as Routes
+from src.classes.Loaders import WorldLinker
+from src.classes.Routes import RouteIndex, RouteTable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class RouteTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Locale paths are relative to the repository root
+        os.chdir(ROOT)
+        with open('game.config.json', 'r') as f:
+            cls.graph = WorldLinker(json.load(f)).link().data_graph
+
+    def assertMatchesSearch(self, table: RouteTable):
+        # Every row as a fresh breadth first search over the table's open edges finds it, next edges included
+        n = len(self.graph.areas)
+        fresh = {source: table.search(source) for source in range(n)}
+        for source in range(n):
+            distances, next_edges = table.rows[source]
+            self.assertEqual(distances, fresh[source][0], f"from {source} with {sorted(table.opened)} open")
+            for target in range(n):
+                edge = next_edges[target]
+                if source == target or distances[target] == n:
+                    self.assertEqual(edge, -1)
+                    continue
+                self.assertNotIn(edge, table.closed)
+                self.assertEqual(table.index.sources[edge], source)
+                self.assertEqual(fresh[self.graph.targets[edge]][0][target], distances[target] - 1)
+
+    def test_relax_matches_a_fresh_search(self):
+        rng = random.Random(0)
+        for _ in range(5):
+            index = RouteIndex.from_graph(self.graph)
+            self.assertTrue(index.dense)
+            table = index.initial
+            self.assertMatchesSearch(table)
+            requirements = list(index.locks)
+            rng.shuffle(requirements)
+            for requirement_id in requirements:
+                table = table.open(requirement_id)
+                self.assertMatchesSearch(table)
+            self.assertFalse(table.closed)
+
+    def test_rows_and_toward_lists_stay_within_budget(self):
+        n = len(self.graph.areas)
+        reference = RouteIndex.from_graph(self.graph).initial
+        with mock.patch.object(Routes, 'DENSE_LIMIT', 0), mock.patch.object(Routes, 'ROW_BUDGET', 5 * n):
+            index = RouteIndex.from_graph(self.graph)
+            self.assertFalse(index.dense)
+            table = index.initial
+            rng = random.Random(1)
+            for _ in range(300):
+                area = rng.randrange(n)
+                if rng.random() < 0.5:
+                    self.assertEqual(table.row(area)[0], reference.row(area)[0])
+                else:
+                    self.assertEqual(table.toward(area), reference.toward(area))
+                self.assertLessEqual((len(table.rows) + len(table.towards)) * n, Routes.ROW_BUDGET)
+
+    def test_tables_stay_within_their_limit(self):
+        index = RouteIndex.from_graph(self.graph)
+        index.table_limit = 3
+        initial = index.initial
+        for requirement_id in index.locks:
+            table = initial.open(requirement_id)
+            self.assertIs(index.tables[table.opened], table)
+            self.assertLessEqual(len(index.tables), 3)
+        self.assertIs(index.initial, initial)
+        # A table used again is the last to go
+        first = next(opened for opened in index.tables if opened)
+        initial.open(next(iter(first)))
+        self.assertEqual(list(index.tables)[-1], first)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import random
+import unittest
+from collections import Counter
+from src.classes.DataStores import DataStore, KeySampler
+
+DRAWS = 20000
+
+def shares(sampler: KeySampler, exclude=()) -> dict:
+    counts = Counter(sampler.pick(exclude) for _ in range(DRAWS))
+    return {key: count / DRAWS for key, count in counts.items()}
+
+class KeySamplerTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.sampler = KeySampler()
+        for key in "abcde":
+            self.sampler.add(key)
+
+    def assertShares(self, actual: dict, expected: dict):
+        self.assertEqual(set(actual), {key for key, share in expected.items() if share > 0})
+        for key, share in expected.items():
+            self.assertAlmostEqual(actual.get(key, 0.0), share, delta=0.02, msg=key)
+
+    def assertTreeMatchesWeights(self):
+        sampler = self.sampler
+        self.assertEqual({key: position for position, key in enumerate(sampler.keys)}, sampler.positions)
+        for count in range(len(sampler.keys) + 1):
+            self.assertAlmostEqual(sampler.prefix(count), sum(sampler.weights[:count]))
+
+    def test_uniform_after_add_and_remove(self):
+        self.sampler.remove("b")
+        self.sampler.add("f")
+        self.sampler.add("a") # already there, changes nothing
+        self.assertShares(shares(self.sampler), dict.fromkeys("acdef", 0.2))
+
+    def test_uniform_with_exclusions(self):
+        self.assertShares(shares(self.sampler, {"a", "d", "missing"}), dict.fromkeys("bce", 1 / 3))
+
+    def test_weighted_after_add_remove_and_reweight(self):
+        self.sampler.set_weight("a", 4.0)
+        self.sampler.set_weight("e", 2.0)
+        # Removing a moves the last key, e, into its place along with its weight
+        self.sampler.remove("a")
+        self.sampler.add("f")
+        self.sampler.set_weight("c", 0.0)
+        self.sampler.set_weight("f", 3.0)
+        self.assertTreeMatchesWeights()
+        self.assertShares(shares(self.sampler), {"b": 1 / 7, "c": 0.0, "d": 1 / 7, "e": 2 / 7, "f": 3 / 7})
+
+    def test_weighted_with_exclusions(self):
+        for key, weight in zip("abcde", (1.0, 2.0, 3.0, 4.0, 5.0)):
+            self.sampler.set_weight(key, weight)
+        self.assertShares(shares(self.sampler, {"b", "e"}), {"a": 1 / 8, "c": 3 / 8, "d": 4 / 8})
+
+    def test_random_changes_keep_the_tree_exact(self):
+        rng = random.Random(1)
+        self.sampler.set_weight("a", 1.5)
+        for step in range(500):
+            key = rng.choice("abcdefghij")
+            roll = rng.random()
+            if roll < 0.4:
+                self.sampler.add(key)
+            elif roll < 0.7:
+                self.sampler.remove(key)
+            elif key in self.sampler.positions:
+                self.sampler.set_weight(key, rng.choice((0.0, 0.5, 1.0, 7.0)))
+        self.assertTreeMatchesWeights()
+
+    def test_everything_excluded(self):
+        self.assertIsNone(self.sampler.pick(set("abcde")))
+        self.sampler.set_weight("a", 2.0)
+        self.assertIsNone(self.sampler.pick(set("abcde")))
+        for key in "bcde":
+            self.sampler.set_weight(key, 0.0)
+        self.assertIsNone(self.sampler.pick({"a"}))
+        self.assertIsNone(KeySampler().pick())
+
+    def test_store_keeps_its_sampler_current(self):
+        store = DataStore[int]()
+        for value, key in enumerate("abc"):
+            store.add(key, value)
+        store.set_weight("c", 0.0)
+        store.remove("a")
+        store.add("d", 3)
+        self.assertEqual({store.get_random() for _ in range(200)}, {1, 3})
+        self.assertIsNone(store.get_random({"b", "d"}))
+
+if __name__ == '__main__':
+    unittest.main()